@@ -0,0 +1,66 @@
+"""
+Benchmark: choose with eagerly evaluated options against lazy ones.
+
+    python benchmarks/choose.py [--options N] [--iterations N] [--renders N]
+
+Every option is a loop doing --iterations math calls and setting a
+variable of its own. Eagerly, all options are rendered and their
+results passed to choose; lazily, they are passed as functions and
+only the chosen one runs, so exactly one variable must be set.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ynaparser import YnaBaseContext, YnaFunctionContext, YnaRootContext, functions
+
+def make_option(index: int, iterations: int):
+    async def option(ctx: YnaBaseContext) -> str:
+        fctx = YnaFunctionContext(ctx)
+        total = 0
+
+        async def body(sub: YnaBaseContext) -> None:
+            nonlocal total
+            total = await functions.math(fctx, "+", str(total), str(sub.get_variable("iter")))
+
+        await functions.loop(fctx, "1,%d,1" % (iterations + 1), body)
+        await functions.set(fctx, "option%d" % index, str(total))
+        return "option %d: %s" % (index, total)
+    return option
+
+async def render(options: list, lazy: bool) -> None:
+    root = YnaRootContext(None)
+    ctx = YnaFunctionContext(root)
+    if lazy:
+        root.write(await functions.choose(ctx, *options))
+        chosen = [name for name in root.variables if name.startswith("option")]
+        assert len(chosen) == 1, chosen
+    else:
+        root.write(await functions.choose(ctx, *[await option(root) for option in options]))
+
+async def bench(options: list, lazy: bool, renders: int) -> float:
+    started = time.perf_counter()
+    for _ in range(renders):
+        await render(options, lazy)
+    return (time.perf_counter() - started) / renders
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--options", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--renders", type=int, default=200)
+    args = parser.parse_args()
+
+    options = [make_option(i, args.iterations) for i in range(args.options)]
+    eager = asyncio.run(bench(options, False, args.renders))
+    lazy = asyncio.run(bench(options, True, args.renders))
+    print("eager: %8.3f ms/render" % (eager * 1000))
+    print("lazy:  %8.3f ms/render (x%.1f)" % (lazy * 1000, eager / lazy))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: member lookups with and without request coalescing.
+
+    python benchmarks/members.py [--renders N] [--lookups N] [--latency SECONDS]
+
+Concurrent renders each look up members with nameof, against an
+in-memory provider that takes --latency seconds per fetch. The same
+workload runs with a loader that fetches every ID on its own and
+caches nothing, and with the default coalescing, caching loader.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ynaparser import YnaFunctionContext, YnaRootContext, functions
+from ynaparser.fake_discord import Context, Guild, Member, User
+from ynaparser.members import YnaGuildMemberProvider, YnaMemberLoader
+
+def make_guild(size: int) -> Guild:
+    return Guild({id: Member(User(id, "user%d" % id, "%04d" % (id % 10000))) for id in range(1, size + 1)})
+
+async def render(guild: Guild, loader: YnaMemberLoader, ids: list[int]) -> None:
+    ctx = YnaFunctionContext(YnaRootContext(Context(guild), member_loader=loader))
+    for id in ids:
+        await functions.nameof(ctx, str(id))
+
+async def bench(guild: Guild, loader: YnaMemberLoader, workload: list[list[int]]) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(render(guild, loader, ids) for ids in workload))
+    return time.perf_counter() - started
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=5, help="nameof calls per render")
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    guild = make_guild(args.members)
+    workload = [[random.randint(1, args.members) for _ in range(args.lookups)] for _ in range(args.renders)]
+
+    for name, loader_args in (("uncoalesced", dict(max_batch_size=1, cache_size=0)), ("coalesced", {})):
+        provider = YnaGuildMemberProvider(guild, latency=args.latency)
+        elapsed = asyncio.run(bench(guild, YnaMemberLoader(provider, **loader_args), workload))
+        print("%-12s %8.3fs %6d fetches %8.0f lookups/s" % (name, elapsed, provider.fetches, args.renders * args.lookups / elapsed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Stress benchmark: renders from many threads at once.
+
+    python benchmarks/threads.py [--renders N] [--threads 1,2,4,8]
+
+Every thread runs its own event loop with several renders interleaved
+on it. Each render writes variables and output derived from its own
+id, and checks at the end that it saw nothing from any other render.
+On a free-threaded build the throughput should scale with the threads.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ynaparser import YnaFunctionContext, YnaRootContext, functions
+from ynaparser.fake_discord import Context, Guild
+
+guild = Guild({})
+
+async def render(render_id: int) -> None:
+    root = YnaRootContext(Context(guild), max_output_length=None)
+    ctx = YnaFunctionContext(root)
+    tag = "r%d" % render_id
+
+    await functions.set(ctx, "tag", tag)
+    if render_id % 2:
+        root.set_variable("newrep", "1")
+    count = await functions.split(ctx, "item", ",".join(tag + str(i) for i in range(50)))
+
+    async def body(sub) -> None:
+        await asyncio.sleep(0)
+        i = sub.get_variable("iter")
+        item = sub.get_variable("item%d" % i)
+        args = (root.get_variable("tag"), "x", item) if root.new_replace else (root.get_variable("tag"), item, "x")
+        sub.write(await functions.rep(ctx, *args))
+        sub.write(await functions.math(ctx, "+", str(render_id), str(i)))
+
+    root.write(await functions.loop(ctx, "1,%d,1" % count, body))
+
+    expected = "".join("x%d%s" % (i, float(render_id + i)) for i in range(1, count))
+    if root.get_variable("tag") != tag or root.output.getvalue() != expected or bool(root.new_replace) != bool(render_id % 2):
+        raise AssertionError("render %d leaked state" % render_id)
+
+def run_thread(render_ids: range, concurrency: int) -> None:
+    async def main():
+        for start in range(render_ids.start, render_ids.stop, concurrency):
+            await asyncio.gather(*(render(i) for i in range(start, min(start + concurrency, render_ids.stop))))
+    asyncio.run(main())
+
+def bench(threads: int, renders: int, concurrency: int) -> float:
+    per_thread = renders // threads
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        futures = [pool.submit(run_thread, range(t * per_thread, (t + 1) * per_thread), concurrency) for t in range(threads)]
+        for future in futures:
+            future.result()
+    return per_thread * threads / (time.perf_counter() - started)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--renders", type=int, default=4000)
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--concurrency", type=int, default=16, help="renders interleaved on each event loop")
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("GIL %s" % (gil and "enabled" or "disabled"))
+    baseline = None
+    for threads in map(int, args.threads.split(",")):
+        throughput = bench(threads, args.renders, args.concurrency)
+        baseline = baseline or throughput
+        print("%2d threads: %8.0f renders/s (x%.2f)" % (threads, throughput, throughput / baseline))
+
+if __name__ == "__main__":
+    main()
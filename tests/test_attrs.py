@@ -0,0 +1,36 @@
+import pytest
+
+from ynaparser import YnaError
+from ynaparser.fake_discord import Member, User
+from ynaparser.utils import attr_getter, get
+from ynaparser.utils_yna import compile_attr_path, get_attr
+
+MEMBERS = [Member(User(id, "user%d" % id, "%04d" % id), id % 2 and "nick%d" % id or None) for id in range(1, 5)]
+
+def test_one_accessor_per_path():
+    assert compile_attr_path("display_name") is attr_getter("display_name")
+    assert compile_attr_path("name") is compile_attr_path("name")
+
+def test_paths_are_checked_once():
+    compile_attr_path.cache_clear()
+    for _ in range(3):
+        get_attr(MEMBERS[0], "name")
+        assert compile_attr_path("__class__") is None
+    info = compile_attr_path.cache_info()
+    assert (info.misses, info.hits) == (2, 4)
+
+def test_paths_outside_the_allowlist_are_refused():
+    for path in ("__class__", "name.__class__", "guild", ""):
+        assert compile_attr_path(path) is None
+        with pytest.raises(YnaError):
+            get_attr(MEMBERS[0], path)
+
+def test_get_attr():
+    assert get_attr(MEMBERS[0], "display_name") == "nick1"
+    assert get_attr(MEMBERS[1], "display_name") == "user2"
+
+def test_get():
+    assert get(MEMBERS, name="user3") is MEMBERS[2]
+    assert get(MEMBERS, name="user3", nick=None) is None
+    assert get(MEMBERS, id=2, nick=None) is MEMBERS[1]
+    assert get(MEMBERS, name="nobody") is None
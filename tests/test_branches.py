@@ -0,0 +1,44 @@
+import asyncio
+
+from ynaparser import YnaFunctionContext, YnaRootContext, functions
+
+def make_ctx() -> YnaFunctionContext:
+    return YnaFunctionContext(YnaRootContext(None))
+
+def test_when_evaluates_sync_and_async_branches():
+    async def async_branch(base_ctx):
+        return "async"
+
+    for args, expected in (
+        (("1", "eq", "1", lambda base_ctx: "sync"), "sync"),
+        (("1", "eq", "1", async_branch), "async"),
+        (("1", "eq", "2", async_branch, async_branch), "async"),
+        (("1", "eq", "2", async_branch), None),
+    ):
+        assert asyncio.run(functions.when(make_ctx(), *args)) == expected
+
+def test_when_evaluates_only_the_taken_branch():
+    ctx = make_ctx()
+    evaluated = []
+
+    def branch(name):
+        async def evaluate(base_ctx):
+            evaluated.append(name)
+            return name
+        return evaluate
+
+    assert asyncio.run(functions.when(ctx, "1", "lt", "2", branch("true"), branch("false"))) == "true"
+    assert evaluated == ["true"]
+
+def test_choose_evaluates_only_the_chosen_option():
+    ctx = make_ctx()
+    evaluated = []
+
+    def option(name):
+        async def evaluate(base_ctx):
+            evaluated.append(name)
+            return name
+        return evaluate
+
+    result = asyncio.run(functions.choose(ctx, option("a"), option("b"), option("c")))
+    assert evaluated == [result]
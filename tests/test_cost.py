@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from ynaparser import YnaError, YnaFunctionContext, YnaRootContext, functions
+from ynaparser._functions import _loop_range
+from ynaparser.cost import check, estimate
+
+@pytest.mark.parametrize("args,expected", [
+    ("4", range(1, 4)),
+    ("0,3", range(0, 3)),
+    ("0,6,2", range(0, 6, 2)),
+    (",4,", range(1, 4)),
+    ("5,0,-1", range(5, 0, -1)),
+])
+def test_loop_range(args, expected):
+    assert _loop_range(args) == expected
+
+@pytest.mark.parametrize("args", ["", "x", "1,2,3,4", "1,4,0", "1,x,1"])
+def test_loop_range_errors(args):
+    with pytest.raises(YnaError):
+        _loop_range(args)
+
+def test_loop_with_a_single_arg():
+    ctx = YnaFunctionContext(YnaRootContext(None))
+    assert asyncio.run(functions.loop(ctx, "4", lambda sub: sub.get_variable("iter"))) == "123"
+
+def test_estimate():
+    cost = estimate(["Hi ", ["loop", "1,4,1", ["x"]], ["upper", "abc"]])
+    assert cost.findings == []
+    assert cost.calls == 1 + 3 + 1
+    assert cost.output == 3 + 3 + 9
+
+def test_loadtest_templates_are_templates():
+    cost = estimate([["set", "x", "hi"], ["nameof", "1", "display_name"]])
+    assert cost.findings == []
+    assert cost.calls == 2
+
+@pytest.mark.parametrize("template", [
+    [["loop", "4", ["x"]]],
+    [["loop", "0,3", ["x"]]],
+])
+def test_loop_forms(template):
+    assert estimate(template).calls == 4
+    assert check(template) == []
+
+def test_loop_failing_at_render_time_runs_nothing():
+    cost = estimate([["loop", "1,4,0", [["num"]]]])
+    assert cost.calls == 1
+    assert cost.output == 0
+
+@pytest.mark.parametrize("template,finding", [
+    ([["loop", [["num"]], ["x"]]], "loop: iteration count is not a literal"),
+    ([["math", "pow", [["num"]], "1000"]], "math pow: base is not a literal"),
+    ([["math", "pow", "10", [["num"]]]], "math pow: exponent is not a literal"),
+    ([["math", "pow", "10", "1000"]], "math pow: 10 ** 1000 overflows"),
+    ([["math", "pow", "1e-300", "-2"]], "math pow: 1e-300 ** -2 overflows"),
+    ([["math", "pow", "0", "-1"]], "math pow: 0 ** -1 divides by zero"),
+    ([["loop", "1,3,1"]], "loop: takes 2 arguments, got 1"),
+    ([["when", "1", "eq", "1"] + [["x"]] * 3], "when: takes 4 or 5 arguments, got 6"),
+    ([["math", "floor", [["num"]]]], "math floor: argument is not a literal"),
+    ([["math", "round", "nan"]], "math round: nan is not finite"),
+    ([["nothing", "1"]], "unknown function 'nothing'"),
+    ([["nothing"]], "variable 'nothing' is not set in the template"),
+    ([["loop", "1,3,1", "x"], ["iter"]], "variable 'iter' is not set in the template"),
+    ([[]], "malformed call []"),
+    ([5], "malformed part 5"),
+    ([["upper", [None]]], "malformed part None"),
+    ("text", "malformed template 'text'"),
+])
+def test_findings(template, finding):
+    assert finding in check(template)
+
+def test_limits():
+    assert check([["loop", "1,100,1", ["x" * 100]]]) == ["outputs up to 9900 characters, limit is 2000"]
+    assert check([["loop", "1,100,1", [["upper", "x"]]]], max_calls=100) == ["makes up to 199 calls, limit is 100"]
+
+def test_huge_loop_is_rejected():
+    assert check([["loop", "1,100000000000000000000,1", ["x"]]]) == [
+        "makes up to 100000000000000000000 calls, limit is 10000",
+        "outputs up to 99999999999999999999 characters, limit is 2000",
+    ]
+
+@pytest.mark.parametrize("op,value", [("floor", "1e300"), ("ceil", "9.5"), ("round", "-99.9"), ("floor", "0.1")])
+def test_rounding_is_bounded_by_the_result(op, value):
+    ctx = YnaFunctionContext(YnaRootContext(None))
+    rendered = str(asyncio.run(functions.math(ctx, op, value)))
+    assert len(rendered) <= estimate([["math", op, value]]).output
+
+def test_many_large_roundings_are_rejected():
+    assert check([["math", "floor", "1e300"]] * 10) == ["outputs up to 3020 characters, limit is 2000"]
+
+def test_variables_are_bounded_by_their_sets():
+    cost = estimate([["set", "x", "hello"], ["x"], ["set", "x", "hi"], ["x"], ["loop", "1,100,1", [["iter"], ","]]])
+    assert cost.findings == []
+    assert cost.output == 5 + 5 + 99 * 4
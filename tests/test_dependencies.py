@@ -0,0 +1,121 @@
+import asyncio
+
+from ynaparser import YnaFunctionContext, YnaRootContext, functions
+from ynaparser.decorators import is_nondeterministic
+from ynaparser.fake_discord import Context, Guild, Member, User
+from ynaparser.interpreter import YnaCachedTemplate
+
+def make_root() -> YnaRootContext:
+    return YnaRootContext(Context(Guild({1: Member(User(1, "bob", "0001"))})))
+
+def test_untracked_reads_are_not_recorded():
+    root = make_root()
+    root.set_variable("x", "1")
+    assert root.get_variable("x") == "1"
+    assert root.dependencies is None
+
+def test_reads_and_writes_are_recorded_into_the_segment():
+    root = make_root()
+    root.set_variable("x", "1")
+    with root.track_dependencies() as dependencies:
+        root.get_variable("x")
+        root.get_variable("missing")
+        assert root.peek_variable("peeked") is None
+    assert dependencies.reads == {"x", "missing"}
+    assert not dependencies.writes
+    assert dependencies.cacheable()
+    assert root.dependencies is None
+
+    ctx = YnaFunctionContext(root)
+    for call in (
+        functions.set(ctx, "y", "2"),
+        functions.split(ctx, "z", "a,b"),
+        functions.member(ctx, "m", "bob"),
+        functions.nameof(YnaFunctionContext(root, ret_var="u"), "1", "name"),
+    ):
+        with root.track_dependencies() as dependencies:
+            asyncio.run(call)
+        assert dependencies.writes
+        assert not dependencies.cacheable()
+
+def test_nested_segments_restore_and_propagate():
+    root = make_root()
+    with root.track_dependencies() as outer:
+        root.get_variable("a")
+        with root.track_dependencies() as inner:
+            root.get_variable("b")
+            root.set_variable("c", "1")
+        root.get_variable("d")
+    assert inner.reads == {"b"}
+    assert outer.reads == {"a", "b", "d"}
+    assert outer.writes == {"c"}
+
+def test_nondeterministic_functions_mark_the_segment():
+    root = make_root()
+    ctx = YnaFunctionContext(root)
+
+    async def render():
+        with root.track_dependencies() as deterministic:
+            await functions.upper(ctx, "x")
+        with root.track_dependencies() as outer:
+            with root.track_dependencies() as inner:
+                await functions.num(ctx, "1", "10")
+        with root.track_dependencies() as chosen:
+            await functions.choose(ctx, "a", "b")
+        with root.track_dependencies() as member:
+            await functions.user(ctx, "name")
+        with root.track_dependencies() as now:
+            await functions.time(ctx)
+        return deterministic, outer, inner, chosen, member, now
+
+    deterministic, *segments = asyncio.run(render())
+    assert deterministic.cacheable()
+    for segment in segments:
+        assert segment.nondeterministic
+        assert not segment.cacheable()
+
+def test_is_nondeterministic():
+    for name in ("choose", "wchoose", "num", "user", "time"):
+        assert is_nondeterministic(getattr(functions, name))
+    for name in ("upper", "rep", "math", "nameof"):
+        assert not is_nondeterministic(getattr(functions, name))
+
+TEMPLATE = [
+    "Hello ",
+    ["upper", [["who"]]],
+    ", you are number ",
+    ["counter"],
+    ". ",
+    ["loop", "1,4,1", [["iter"], ["sep"]]],
+    ["rep", "a", "banana", "o"],
+]
+
+def render(template: YnaCachedTemplate, **variables) -> tuple[str, int]:
+    root = make_root()
+    for name, value in variables.items():
+        root.set_variable(name, value)
+    evaluated = asyncio.run(template.render(root))
+    return root.output.getvalue(), evaluated
+
+def test_cached_template_re_evaluates_only_changed_parts():
+    template = YnaCachedTemplate(TEMPLATE)
+    assert render(template, who="ann", counter="1", sep=",") == ("Hello ANN, you are number 1. 1,2,3,bonono", 7)
+    assert render(template, who="ann", counter="1", sep=",") == ("Hello ANN, you are number 1. 1,2,3,bonono", 0)
+    assert render(template, who="ann", counter="2", sep=",") == ("Hello ANN, you are number 2. 1,2,3,bonono", 1)
+    assert render(template, who="bob", counter="2", sep=";") == ("Hello BOB, you are number 2. 1;2;3;bonono", 2)
+    # rep depends on newrep
+    assert render(template, who="bob", counter="2", sep=";", newrep="1") == ("Hello BOB, you are number 2. 1;2;3;o", 1)
+
+def test_cached_template_replays_side_effects():
+    template = YnaCachedTemplate([["set", "x", [["input"]]], "x is ", ["x"], ["split", "p", "a,b"], ["p1"]])
+    # split writes the number of elements
+    assert render(template, input="1") == ("x is 12b", 5)
+    # set and split run every time, the parts reading what they wrote
+    # are spliced in while it stays the same
+    assert render(template, input="1") == ("x is 12b", 2)
+    assert render(template, input="2") == ("x is 22b", 3)
+
+def test_cached_template_recomputes_nondeterministic_parts():
+    template = YnaCachedTemplate(["n=", ["num", "1", "1000000"], ["when", "1", "eq", "1", [["choose", "a"]]]])
+    render(template)
+    assert render(template)[1] == 2
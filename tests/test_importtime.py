@@ -0,0 +1,4 @@
+from ynaparser import importtime
+
+def test_import_stays_within_budget():
+    assert importtime.check(runs=3) == []
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+from ynaparser import YnaRootContext, cost, loadtest
+from ynaparser.fake_discord import Context
+
+def write_corpus(tmp_path, corpus) -> str:
+    path = tmp_path / "corpus.json"
+    path.write_text(json.dumps(corpus))
+    return str(path)
+
+def test_load_corpus(tmp_path):
+    corpus = {"greet": [["set", "x", "hi"], ["nameof", "1", "display_name"]]}
+    assert loadtest.load_corpus(write_corpus(tmp_path, corpus)) == corpus
+
+@pytest.mark.parametrize("corpus", [
+    [["set", "x", "hi"]],
+    "greet",
+    {"greet": "set"},
+    {"greet": [[]]},
+    {"greet": [5]},
+    {"greet": [["set", "x", 1]]},
+    {"greet": [["nothing", "1"]]},
+    {"greet": [["loop", "1,3,1", [["nothing", "1"]]]]},
+    {"greet": [["upper", [None]]]},
+    {"greet": [["YnaError", "1"]]},
+])
+def test_load_corpus_rejects_malformed(tmp_path, corpus):
+    with pytest.raises(ValueError):
+        loadtest.load_corpus(write_corpus(tmp_path, corpus))
+
+def slow_render(seconds: float):
+    async def render(root, calls):
+        await asyncio.sleep(seconds)
+    return render
+
+def test_latency_counts_from_when_a_render_was_due(monkeypatch):
+    monkeypatch.setattr(loadtest, "render", slow_render(0.05))
+    result = asyncio.run(loadtest.run({"t": []}, loadtest.make_guild(1), 5, rate=100, concurrency=1))
+    latencies = sorted(result["templates"]["t"]["latencies"])
+    # renders are due every 10ms but take 50ms each, one at a time
+    assert latencies[-1] >= 0.15
+
+def test_closed_loop_latency(monkeypatch):
+    monkeypatch.setattr(loadtest, "render", slow_render(0.05))
+    result = asyncio.run(loadtest.run({"t": []}, loadtest.make_guild(1), 5, concurrency=1))
+    latencies = result["templates"]["t"]["latencies"]
+    assert len(latencies) == 5
+    assert max(latencies) < 0.1
+    assert result["elapsed"] >= 0.25
+
+def test_render_writes_results():
+    root = YnaRootContext(Context(loadtest.make_guild(2)))
+    asyncio.run(loadtest.render(root, [["set", "x", "hi"], ["upper", "hi"], ["nameof", "1", "display_name"]]))
+    assert root.output.getvalue() == "HInick1"
+
+NESTED = {
+    "loop": [["loop", "1,4,1", [["math", "+", "1", "1"], ","]], "!"],
+    "string body": [["loop", "1,3,1", "x"]],
+    "when": [["upper", [["when", "1", "eq", "1", ["y", ["loop", "1,3,1", "e"]], ["no"]]]], "s"],
+    "nested loop": [["loop", "1,3,1", [["loop", "1,3,1", "ab"], "|"]]],
+    "set": [["set", "x", [["loop", "1,3,1", "z"]]], ["rep", "z", [["loop", "1,3,1", "zz"]], "y"]],
+    "choose": [["choose", ["a", ["loop", "1,3,1", "b"]]]],
+    "wchoose": [["wchoose", [["upper", "c"]], "1"]],
+}
+
+EXPECTED = {
+    "loop": "2.0,2.0,2.0,!",
+    "string body": "xx",
+    "when": "YEEs",
+    "nested loop": "abab|abab|",
+    "set": "yyyy",
+    "choose": "abb",
+    "wchoose": "C",
+}
+
+@pytest.mark.parametrize("name", NESTED)
+def test_render_nested_templates(tmp_path, name):
+    corpus = loadtest.load_corpus(write_corpus(tmp_path, NESTED))
+    root = YnaRootContext(Context(loadtest.make_guild(2)))
+    asyncio.run(loadtest.render(root, corpus[name]))
+    assert root.output.getvalue() == EXPECTED[name]
+    assert cost.estimate(corpus[name]).findings == []
+
+def test_nested_templates_are_lazy():
+    root = YnaRootContext(Context(loadtest.make_guild(2)))
+    asyncio.run(loadtest.render(root, [["when", "1", "eq", "2", [["set", "x", "1"]], [["set", "y", "1"]]]]))
+    assert root.get_variable("x") is None
+    assert root.get_variable("y") == "1"
+
+@pytest.mark.parametrize("values,p,expected", [
+    ([1, 2], 50, 1),
+    ([1, 2], 51, 2),
+    (list(range(1, 101)), 99, 99),
+    (list(range(1, 101)), 100, 100),
+    (list(range(1, 11)), 95, 10),
+    ([5], 0, 5),
+    ([], 50, 0.0),
+])
+def test_percentile_is_nearest_rank(values, p, expected):
+    assert loadtest.percentile(values, p) == expected
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from ynaparser.fake_discord import Guild, Member, User
+from ynaparser.members import YnaGuildMemberProvider, YnaMemberLoader, YnaMemberProvider
+
+def make_guild() -> Guild:
+    return Guild({id: Member(User(id, "user%d" % id, "%04d" % id)) for id in range(1, 4)})
+
+def test_loads_are_coalesced_and_cached():
+    provider = YnaGuildMemberProvider(make_guild())
+    loader = YnaMemberLoader(provider)
+
+    async def main():
+        first = await asyncio.gather(*(loader.load(id) for id in (1, 2, 2, 3, 4)))
+        second = await loader.load(2)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert [member and member.id for member in first] == [1, 2, 2, 3, None]
+    assert second.id == 2
+    assert provider.fetches == 1
+
+@pytest.mark.parametrize("load", [
+    lambda loader: loader.load(1),
+    lambda loader: loader.load_named("user1"),
+])
+def test_cancelled_fetch_frees_the_key(load):
+    provider = YnaGuildMemberProvider(make_guild(), latency=60)
+    loader = YnaMemberLoader(provider)
+
+    async def main():
+        waiter = asyncio.ensure_future(load(loader))
+        while not provider.fetches:
+            await asyncio.sleep(0)
+        for task in list(loader._tasks):
+            task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(waiter, 1)
+        assert not loader._pending
+
+        provider.latency = 0
+        return await asyncio.wait_for(load(loader), 1)
+
+    assert asyncio.run(main()).id == 1
+    assert provider.fetches == 2
+
+def test_incomplete_providers_are_refused():
+    class Incomplete(YnaMemberProvider):
+        async def fetch_members(self, ids):
+            return {}
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def run_with_clock(main):
+    """
+    Runs main(clock) with the loop time read from clock[0].
+    """
+
+    async def wrapper():
+        clock = [0.0]
+        asyncio.get_running_loop().time = lambda: clock[0]
+        return await main(clock)
+    return asyncio.run(wrapper())
+
+def test_results_expire_after_ttl():
+    provider = YnaGuildMemberProvider(make_guild())
+    loader = YnaMemberLoader(provider, ttl=10)
+
+    async def main(clock):
+        await loader.load(1)
+        clock[0] = 9.9
+        await loader.load(1)
+        fetches = provider.fetches
+        clock[0] = 10
+        await loader.load(1)
+        return fetches
+
+    assert run_with_clock(main) == 1
+    assert provider.fetches == 2
+
+def test_least_recently_used_results_are_evicted():
+    provider = YnaGuildMemberProvider(make_guild())
+    loader = YnaMemberLoader(provider, cache_size=2)
+
+    async def main(clock):
+        await loader.load(1)
+        await loader.load(2)
+        # 1 is now used more recently than 2
+        await loader.load(1)
+        await loader.load(3)
+        assert provider.fetches == 3
+        await loader.load(1)
+        assert provider.fetches == 3
+        await loader.load(2)
+        assert provider.fetches == 4
+
+    run_with_clock(main)
+    assert len(loader._cache) == 2
@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+from math import ceil, floor, inf
+
+import pytest
+
+from ynaparser import YnaError, YnaFunctionContext, YnaRootContext, functions
+from ynaparser._functions import YnaMathOperator, YnaWhenOperator, YnaWhenTypes, math_opcode, when_opcode
+from ynaparser.utils_yna import get_float, get_int, is_yna_error
+
+ALIASES = {
+    "+": "add", "-": "sub", "*": "mul", "/": "div", "/f": "div", "//": "idiv", "%": "mod",
+    "**": "pow", "&": "and", "|": "or", "^": "xor", "~": "not",
+}
+
+def reference_math(op: str, *args: str):
+    """
+    math as it was before the opcode table, one case per operator.
+    """
+
+    if not args:
+        raise YnaError("no args", source_function="math")
+    op = ALIASES.get(op, op)
+    args = list(args)
+
+    def ensure(amount, cast, error):
+        if len(args) < amount:
+            raise YnaError("invalid args", source_function="math")
+        args[:] = [cast(arg, error=error, source_function="math") for arg in args]
+
+    floats = lambda amount: ensure(amount, get_float, "non-float args")
+    ints = lambda amount: ensure(amount, get_int, "non-int args")
+    try:
+        match op:
+            case "add":
+                floats(2)
+                resolution = sum(args[1:], args[0])
+            case "sub":
+                floats(2)
+                resolution = args[0] - args[1]
+            case "mul":
+                floats(2)
+                resolution = args[0]
+                for i in args[1:]:
+                    resolution *= i
+            case "div":
+                floats(2)
+                resolution = args[0] / args[1]
+            case "idiv":
+                ints(2)
+                resolution = args[0] // args[1]
+            case "mod":
+                ints(2)
+                resolution = args[0] % args[1]
+            case "pow":
+                floats(2)
+                resolution = args[0] ** args[1]
+            case "and":
+                ints(2)
+                resolution = args[0]
+                for i in args[1:]:
+                    resolution &= i
+            case "or":
+                ints(2)
+                resolution = args[0]
+                for i in args[1:]:
+                    resolution |= i
+            case "xor":
+                ints(2)
+                resolution = args[0] ^ args[1]
+            case "not":
+                ints(1)
+                resolution = ~args[0]
+            case "max":
+                floats(2)
+                resolution = max(*args)
+            case "min":
+                floats(2)
+                resolution = min(*args)
+            case "floor":
+                floats(1)
+                resolution = floor(args[0])
+            case "ceil":
+                floats(1)
+                resolution = ceil(args[0])
+            case "round":
+                floats(1)
+                resolution = round(args[0])
+            case _:
+                raise YnaError("unknon op", source_function="math")
+    except ZeroDivisionError as e:
+        raise YnaError("divide by 0", source_function="math") from e
+
+    if resolution >= inf:
+        raise YnaError("inf", source_function="math")
+    elif resolution <= -inf:
+        raise YnaError("-inf", source_function="math")
+    return resolution
+
+def outcome(func, *args):
+    try:
+        result = func(*args)
+        if hasattr(result, "__await__"):
+            result = asyncio.run(result)
+    except Exception as e:
+        return type(e), e.args
+    # repr, so that nan is equal to nan
+    return type(result), repr(result)
+
+MATH_OPS = [op.value for op in YnaMathOperator] + list(ALIASES) + ["nothing"]
+MATH_VALUES = ["3", "-2", "0", "2.5", "x", "1e308", "7"]
+
+@pytest.mark.parametrize("op", MATH_OPS)
+def test_math_matches_reference(op):
+    ctx = YnaFunctionContext(YnaRootContext(None))
+    for count in range(0, 4):
+        for args in itertools.product(MATH_VALUES, repeat=count):
+            expected = outcome(reference_math, op, *args)
+            assert outcome(functions.math, ctx, op, *args) == expected, (op, args)
+
+def test_math_opcode():
+    assert math_opcode("+") is math_opcode("add")
+    assert math_opcode("/f") is math_opcode("div")
+    assert math_opcode("nothing") is None
+
+def reference_condition(arg1, op, arg2) -> bool:
+    """
+    The conditions of when as they were before the opcode table,
+    with is /regex/ matching arg1 against the regex.
+    """
+
+    numbers = lambda: (get_int(arg1, error="args must be numbers"), get_int(arg2, error="args must be numbers"))
+    match op:
+        case "eq":
+            return arg1 == arg2
+        case "ne":
+            return arg1 != arg2
+        case "lt":
+            a, b = numbers()
+            return a < b
+        case "le":
+            a, b = numbers()
+            return a <= b
+        case "gt":
+            a, b = numbers()
+            return a > b
+        case "ge":
+            a, b = numbers()
+            return a >= b
+        case "in":
+            return arg1 in (arg2.split(",") if "," in arg2 else arg2)
+        case "is":
+            match arg2:
+                case "word":
+                    return len(arg1.split()) == 1
+                case "letter":
+                    return arg1.isalpha()
+                case "number" | "decimal":
+                    try:
+                        (int if arg2 == "number" else float)(arg1)
+                    except ValueError:
+                        return False
+                    return True
+                case "error":
+                    return is_yna_error(arg1)
+                case _:
+                    import re
+                    return bool(re.match(arg2[1:-1], arg1))
+
+WHEN_VALUES = ["1", "2", "-1", "1.5", "a", "a b", "ab", "a,b", ""]
+
+@pytest.mark.parametrize("op", [op.value for op in YnaWhenOperator if op.value != "is"])
+def test_when_opcodes_match_reference(op):
+    for arg1, arg2 in itertools.product(WHEN_VALUES, repeat=2):
+        expected = outcome(reference_condition, arg1, op, arg2)
+        actual = outcome(when_opcode(op), arg1, arg2)
+        if expected[0] is YnaError:
+            # only the kind of error is compared, not its source
+            assert actual[0] is YnaError, (op, arg1, arg2)
+        else:
+            assert actual == expected, (op, arg1, arg2)
+
+@pytest.mark.parametrize("name", [t.value for t in YnaWhenTypes] + ["/a.?/", "/^[0-9]+$/", "/b/"])
+def test_when_types_match_reference(name):
+    for arg1 in WHEN_VALUES + ["12", "1e5"]:
+        assert when_opcode("is")(arg1, name) == reference_condition(arg1, "is", name), (name, arg1)
+
+def when(arg1: str, op: str, arg2: str) -> str:
+    ctx = YnaFunctionContext(YnaRootContext(None))
+    return asyncio.run(functions.when(ctx, arg1, op, arg2, lambda ctx: "yes", lambda ctx: "no"))
+
+def test_is_regex_matches_arg1_against_the_pattern():
+    assert when("abc", "is", "/a.c/") == "yes"
+    assert when("abc", "is", "/b/") == "no"
+    # used to match arg1 without its ends against arg1 itself
+    assert when("/x/", "is", "/y/") == "no"
+    assert when("123", "is", "/[0-9]+/") == "yes"
+
+@pytest.mark.parametrize("op,arg2", [("nothing", "1"), ("is", "nothing"), ("is", "/(/"), ("lt", "x")])
+def test_when_errors(op, arg2):
+    with pytest.raises(YnaError):
+        when("1", op, arg2)
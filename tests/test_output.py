@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from ynaparser import YnaError, YnaFunctionContext, YnaOutput, YnaRootContext, functions
+
+def test_fragments_are_joined():
+    output = YnaOutput()
+    for value in ("a", None, 1, "bc"):
+        output.write(value)
+    assert output.getvalue() == "a1bc"
+    assert len(output) == 4
+
+def test_overflow_truncates_then_rejects():
+    output = YnaOutput(5)
+    output.write("abc")
+    with pytest.raises(YnaError):
+        output.write("defg")
+    assert output.getvalue() == "abcde"
+    assert len(output) == 5
+    with pytest.raises(YnaError):
+        output.write("h")
+    assert output.getvalue() == "abcde"
+
+def test_output_up_to_the_limit_is_accepted():
+    output = YnaOutput(3)
+    output.write("abc")
+    output.write("")
+    assert output.getvalue() == "abc"
+
+def test_children_share_the_limit():
+    output = YnaOutput(5)
+    child = output.child()
+    grandchild = child.child()
+    grandchild.write("abc")
+    with pytest.raises(YnaError):
+        child.write("def")
+    assert child.getvalue() == "de"
+    assert output.getvalue() == ""
+
+def test_taking_from_a_child_frees_its_share():
+    output = YnaOutput(5)
+    child = output.child()
+    child.write("abcd")
+    assert child.take() == "abcd"
+    assert len(child) == 0
+    output.write("abcd")
+    with pytest.raises(YnaError):
+        output.child().write("ef")
+
+def make_ctx(max_output_length=None) -> YnaFunctionContext:
+    return YnaFunctionContext(YnaRootContext(None, max_output_length=max_output_length))
+
+def test_loop_returns_every_iteration():
+    ctx = make_ctx()
+
+    async def body(sub):
+        return "<%s>" % sub.get_variable("iter")
+
+    assert asyncio.run(functions.loop(ctx, "1,4,1", lambda sub: sub.get_variable("iter"))) == "123"
+    assert asyncio.run(functions.loop(ctx, "1,3,1", body)) == "<1><2>"
+    assert asyncio.run(functions.loop(ctx, "1,1,1", body)) == ""
+    assert ctx.root_ctx.output.getvalue() == ""
+
+def test_loop_stops_at_the_output_limit():
+    ctx = make_ctx(10)
+    iterations = []
+
+    def body(sub):
+        iterations.append(sub.get_variable("iter"))
+        return "abcd"
+
+    with pytest.raises(YnaError):
+        asyncio.run(functions.loop(ctx, "1,100,1", body))
+    assert iterations == [1, 2, 3]
+
+def test_nested_loop_stops_at_the_output_limit():
+    ctx = make_ctx(10)
+    iterations = []
+
+    async def inner(sub):
+        iterations.append(sub.get_variable("iter"))
+        return "ab"
+
+    async def outer(sub):
+        return await functions.loop(YnaFunctionContext(sub), "1,3,1", inner)
+
+    with pytest.raises(YnaError):
+        asyncio.run(functions.loop(ctx, "1,100,1", outer))
+    # 5 inner iterations fit, the 6th crosses the limit
+    assert len(iterations) == 6
+
+def test_rendered_results_count_once():
+    ctx = make_ctx(10)
+    root = ctx.root_ctx
+    root.write(asyncio.run(functions.loop(ctx, "1,3,1", lambda sub: "abcd")))
+    assert root.output.getvalue() == "abcdabcd"
+    with pytest.raises(YnaError):
+        asyncio.run(functions.loop(ctx, "1,3,1", lambda sub: "abcd"))
+
+def test_nested_when_is_an_argument():
+    ctx = make_ctx()
+    result = asyncio.run(functions.upper(ctx, asyncio.run(functions.when(ctx, "1", "eq", "1", lambda sub: "yes"))))
+    assert result == "YES"
+    assert ctx.root_ctx.output.getvalue() == ""
+
+def test_nested_loop_is_an_argument():
+    ctx = make_ctx()
+
+    async def render():
+        looped = await functions.loop(ctx, "1,4,1", lambda sub: "a%s" % sub.get_variable("iter"))
+        replaced = await functions.rep(ctx, "a", looped, "-")
+        await functions.set(ctx, "x", await functions.loop(ctx, "1,3,1", lambda sub: "y"))
+        return replaced
+
+    assert asyncio.run(render()) == "-1-2-3"
+    assert ctx.root_ctx.get_variable("x") == "yy"
+    assert ctx.root_ctx.output.getvalue() == ""
+
+def test_written_bodies_are_captured():
+    ctx = make_ctx()
+
+    async def branch(sub):
+        sub.write("a")
+        sub.write(await functions.loop(YnaFunctionContext(sub), "1,3,1", lambda inner: "b"))
+        return "c"
+
+    assert asyncio.run(functions.when(ctx, "1", "eq", "1", branch)) == "abbc"
+    assert ctx.root_ctx.output.getvalue() == ""
+    assert ctx.root_ctx.output.used == 0
+
+def test_chosen_option_is_stored():
+    root = YnaRootContext(None)
+    ctx = YnaFunctionContext(root, ret_var="k")
+
+    async def option(sub):
+        return await functions.loop(YnaFunctionContext(sub), "1,3,1", lambda inner: inner.get_variable("iter"))
+
+    assert asyncio.run(functions.choose(ctx, option)) is None
+    assert root.get_variable("k") == "12"
+    assert root.output.getvalue() == ""
+
+def test_iter_is_local_to_the_loop():
+    ctx = make_ctx()
+    root = ctx.root_ctx
+
+    async def outer(sub):
+        inner = await functions.loop(YnaFunctionContext(sub), "1,3,1", lambda inner: inner.get_variable("iter"))
+        return "%s:%s " % (sub.get_variable("iter"), inner)
+
+    assert asyncio.run(functions.loop(ctx, "1,3,1", outer)) == "1:12 2:12 "
+    assert root.get_variable("iter") is None
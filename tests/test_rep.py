@@ -0,0 +1,77 @@
+import asyncio
+import random
+
+import pytest
+
+from ynaparser import YnaFunctionContext, YnaRootContext, functions
+from ynaparser._functions import rep_chain
+from ynaparser.utils_yna import _fuse_replacements, replace_many
+
+ALPHABET = "abc"
+# replacements may bring in characters the content doesn't have
+NEW_ALPHABET = "abcxy"
+
+def random_text(rng: random.Random, max_length: int, alphabet: str = ALPHABET) -> str:
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+def sequential(content: str, replacements: list[tuple[str, str]]) -> str:
+    for old, new in replacements:
+        content = content.replace(old, new)
+    return content
+
+def test_replace_many_matches_sequential_replaces():
+    rng = random.Random(0)
+    for _ in range(5000):
+        replacements = [(random_text(rng, 3), random_text(rng, 3, NEW_ALPHABET)) for _ in range(rng.randint(0, 4))]
+        content = random_text(rng, 12)
+        assert replace_many(content, replacements) == sequential(content, replacements), replacements
+
+@pytest.mark.parametrize("replacements", [
+    (("a", "1"), ("b", "2")),
+    (("a", ""), ("b", "2")),
+    (("cat", "dog"), ("fish", "bird")),
+    (("hello", "bye"), ("world", "you"), ("!", "?")),
+])
+def test_fused_in_one_pass(replacements):
+    assert _fuse_replacements(replacements) is not None
+
+@pytest.mark.parametrize("replacements", [
+    # the first new makes the second old
+    (("a", "b"), ("b", "c")),
+    # the olds overlap
+    (("ab", "x"), ("bc", "y")),
+    (("ab", "x"), ("b", "y")),
+    # removing the first old joins content into the second
+    (("xx", ""), ("ab", "y")),
+    (("", "x"), ("a", "y")),
+])
+def test_not_fused_when_unsafe(replacements):
+    assert _fuse_replacements(replacements) is None
+
+def chained_rep(ctx: YnaFunctionContext, content: str, links: list[tuple]) -> str:
+    async def evaluate():
+        value = content
+        for var, *args in links:
+            args = [value if arg is None else arg for arg in args]
+            value = await functions.rep(ctx, var, *args)
+        return value
+    return asyncio.run(evaluate())
+
+@pytest.mark.parametrize("newrep", [False, True])
+def test_rep_chain_matches_chained_rep(newrep):
+    rng = random.Random(1)
+    for _ in range(2000):
+        root = YnaRootContext(None)
+        if newrep:
+            root.set_variable("newrep", "1")
+        ctx = YnaFunctionContext(root)
+        content = random_text(rng, 12)
+        links = []
+        for _ in range(rng.randint(1, 5)):
+            var, other = random_text(rng, 2), random_text(rng, 3, NEW_ALPHABET)
+            # the nested call is either the content or the replacement
+            nested_is_content = rng.random() < 0.8
+            in_str, with_str = (None, other) if nested_is_content else (other, None)
+            links.append((var, with_str, in_str) if newrep else (var, in_str, with_str))
+        expected = chained_rep(ctx, content, links)
+        assert asyncio.run(rep_chain(ctx, content, *links)) == expected, (content, links)
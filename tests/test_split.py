@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from ynaparser import YnaFunctionContext, YnaRootContext, YnaSplitView, functions
+
+def split(ctx: YnaFunctionContext, var: str, content: str, sep: str = ",") -> int:
+    return asyncio.run(functions.split(ctx, var, content, sep))
+
+def make_ctx() -> YnaFunctionContext:
+    return YnaFunctionContext(YnaRootContext(None))
+
+@pytest.mark.parametrize("content,sep", [
+    ("a,b,c", ","), ("", ","), (",", ","), ("a,,b,", ","), ("a::b::::c", "::"), ("aaa", "aa"),
+])
+def test_view_matches_str_split(content, sep):
+    view = YnaSplitView(content, sep)
+    parts = content.split(sep)
+    assert len(view) == len(parts)
+    assert [view[i] for i in range(len(view))] == parts
+    assert [view[-i] for i in range(1, len(view) + 1)] == [parts[-i] for i in range(1, len(parts) + 1)]
+    with pytest.raises(IndexError):
+        view[len(view)]
+
+def test_elements_are_read_as_variables():
+    ctx = make_ctx()
+    assert split(ctx, "x", "a,b,c") == 3
+    root = ctx.root_ctx
+    assert [root.get_variable("x%d" % i) for i in range(3)] == ["a", "b", "c"]
+    for name in ("x3", "x01", "x", "x-1", "x²", "y0"):
+        assert root.get_variable(name, "default") == "default"
+
+@pytest.mark.parametrize("prefix", ["v2", "a1", "9"])
+def test_prefix_ending_in_a_digit(prefix):
+    ctx = make_ctx()
+    split(ctx, prefix, "a,b,c")
+    root = ctx.root_ctx
+    assert [root.get_variable(prefix + str(i)) for i in range(3)] == ["a", "b", "c"]
+
+def test_longest_prefix_wins():
+    ctx = make_ctx()
+    root = ctx.root_ctx
+    split(ctx, "v", ",".join("v%d" % i for i in range(30)))
+    split(ctx, "v1", "x,y")
+    assert root.get_variable("v10") == "x"
+    assert root.get_variable("v11") == "y"
+    # out of range for v1, so still an element of v
+    assert root.get_variable("v12") == "v12"
+    assert root.get_variable("v2") == "v2"
+
+def test_unsetting_an_element():
+    ctx = make_ctx()
+    root = ctx.root_ctx
+    split(ctx, "x", "a,b,c")
+    asyncio.run(functions.set(ctx, "x1", ""))
+    root.set_variable("x1", None)
+    root.set_variable("missing", None)
+    assert root.get_variable("x1", "default") == "default"
+    assert root.get_variable("x0") == "a"
+    root.set_variable("x1", "B")
+    assert root.get_variable("x1") == "B"
+
+def test_split_replaces_variables_and_unset_elements():
+    ctx = make_ctx()
+    root = ctx.root_ctx
+    root.set_variable("x0", "old")
+    root.set_variable("x5", "kept")
+    split(ctx, "x", "a,b")
+    root.set_variable("x1", None)
+    split(ctx, "x", "c,d")
+    assert [root.get_variable(name) for name in ("x0", "x1", "x5")] == ["c", "d", "kept"]
@@ -1,2 +1,35 @@
-from .classes import *
-from . import functions
\ No newline at end of file
+# Avoid importing typing (and importlib, see __getattr__) up front.
+TYPE_CHECKING = False
+
+# Submodules and the names they export are loaded on first access,
+# so that importing the package stays cheap for processes that
+# only need part of it.
+_lazy_submodules = {"classes", "functions", "fake_discord", "members", "utils", "utils_yna", "decorators", "importtime", "loadtest", "cost", "interpreter"}
+_lazy_attrs = {
+    "YnaBareContext": "classes", "YnaBaseContext": "classes",
+    "YnaRootContext": "classes", "YnaSubContext": "classes",
+    "YnaFunctionContext": "classes",
+    "YnaOutput": "classes", "YnaSplitView": "classes",
+    "YnaDependencies": "classes",
+    "YnaError": "classes",
+}
+
+__all__ = [*_lazy_attrs, "functions"]
+
+if TYPE_CHECKING:
+    from .classes import *
+    from . import functions
+
+def __getattr__(name: str):
+    from importlib import import_module
+
+    if name in _lazy_submodules:
+        return import_module("." + name, __name__)
+    if name in _lazy_attrs:
+        value = getattr(import_module("." + _lazy_attrs[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | _lazy_submodules | set(_lazy_attrs))
@@ -1,16 +1,18 @@
-from copy import copy
+from functools import lru_cache, reduce
 from math import ceil, floor, inf
 from types import FunctionType
-from .classes import YnaBaseContext, YnaError, YnaFunctionContext, YnaSubContext
-from .decorators import yna_function, global_variable_getter, result_storable
-from typing import Any, Optional
-from datetime import datetime, timedelta
-from urllib.parse import quote as urlencode
-from random import choice, choices, randrange
-from .fake_discord import Member
-from .utils_yna import get_attr, is_yna_error, get_int, get_float
+from .classes import YnaBaseContext, YnaError, YnaFunctionContext, YnaSplitView, YnaSubContext
+from .decorators import yna_function, global_variable_getter, nondeterministic, result_storable
+from typing import TYPE_CHECKING, Any, Optional
+from .utils_yna import get_attr, is_yna_error, get_int, get_float, replace_many
 from enum import Enum
-import re
+import operator
+
+if TYPE_CHECKING:
+    from .fake_discord import Member
+
+# datetime, urllib.parse, random and re are imported by the functions
+# that need them, so they are only loaded once a template uses them.
 
 __all__ = [
     "YnaWhenOperator", "YnaWhenTypes", "YnaMathOperator",
@@ -149,12 +151,15 @@ async def slice(ctx: YnaFunctionContext, args: ParamString, content: str) -> str
 
 @yna_function
 @global_variable_getter
+@nondeterministic
 @result_storable
 async def time(ctx: YnaFunctionContext, offset: int = 0, template: str = "%H:%M") -> str:
     """
     Gets the current time.
     """
 
+    from datetime import datetime, timedelta
+
     offset = get_int(offset, error="invalid offset")
     time = datetime.now()
     try:
@@ -175,23 +180,58 @@ async def parse(ctx: YnaFunctionContext, quote: str) -> str:
     Converts characters into a string into a format that can be used in URLs.
     """
 
+    from urllib.parse import quote as urlencode
+
     if not quote:
         raise YnaError("no content")
     return urlencode(quote)
 
+async def _evaluate_option(ctx: YnaFunctionContext, option: Any | FunctionType) -> Any:
+    """
+    Evaluates an option the interpreter passed as a function,
+    like the branches of when, in a sub context of its own.
+    """
+
+    if not callable(option):
+        return option
+    return await _evaluate_body(YnaSubContext(ctx.base_ctx), option)
+
+async def _evaluate_body(context: YnaSubContext, body: FunctionType) -> Any:
+    """
+    Evaluates a body in context. What the body wrote to the context
+    is returned along with its result, for the caller to use like
+    any other value.
+    """
+
+    result = body(context)
+    if hasattr(result, "__await__"):
+        result = await result
+    written = context.output.take()
+    if not written:
+        return result
+    return written if result is None else written + str(result)
+
+# special case: interpreter evaluates options to functions,
+# so only the chosen one is rendered
 @yna_function
+@nondeterministic
 @result_storable
 async def choose(ctx: YnaFunctionContext, *options: tuple) -> str:
     """
     Chooses a random element from a given list.
     """
 
+    from random import choice
+
     if not options or _len(options) <= 0:
         raise YnaError("no options")
 
-    return choice(options)
+    return await _evaluate_option(ctx, choice(options))
 
+# special case: interpreter evaluates options to functions,
+# weights are evaluated as usual
 @yna_function
+@nondeterministic
 @result_storable
 async def wchoose(ctx: YnaFunctionContext, *options: tuple) -> str:
     """
@@ -200,31 +240,36 @@ async def wchoose(ctx: YnaFunctionContext, *options: tuple) -> str:
     wchoose(ctx, option: Any, weight: float, ...)
     """
 
+    from random import choices
+
     if not options or _len(options) <= 0:
         raise YnaError("no options")
     if _len(options) % 2 != 0:
         raise YnaError("mismatched weightings")
 
-    options = list(copy(options))
+    options = list(options)
     population = options[::2]
     weights = options[1::2]
     _func_name = "wchoose"
     weights = map(lambda x: get_float(x, error="invalid weight", source_function=_func_name), weights)
 
-    return choices(population, weights)
+    return await _evaluate_option(ctx, choices(population, weights)[0])
 
 @yna_function
+@nondeterministic
 @result_storable
-async def user(ctx: YnaFunctionContext, attrs: str = None, *args: Optional[FunctionArguments]) -> Member | Any:
+async def user(ctx: YnaFunctionContext, attrs: str = None, *args: Optional[FunctionArguments]) -> "Member | Any":
     """
     Chooses a random member from the server.
     Can choose any member, not just online/active/in the channel members.
     """
 
+    from random import choice
+
     if args and _len(args) > 0:
         raise YnaError("too many args")
 
-    rand_user = choice(ctx.base_ctx.get_members())
+    rand_user = choice(await ctx.root_ctx.get_members())
     if not attrs or not attrs.strip():
         return rand_user
 
@@ -244,7 +289,7 @@ async def nameof(ctx: YnaFunctionContext, id: int, attrs: str = None, *args: Opt
         raise YnaError("no id")
 
     id = get_int(id, error="no id")
-    user = ctx.base_ctx.get_member(id)
+    user = await ctx.root_ctx.get_member(id)
     if not user:
         raise YnaError("not found")
 
@@ -254,12 +299,15 @@ async def nameof(ctx: YnaFunctionContext, id: int, attrs: str = None, *args: Opt
     return get_attr(user, attrs)
 
 @yna_function
+@nondeterministic
 @result_storable
 async def num(ctx: YnaFunctionContext, min: int = 0, max: int = 100, step: int = 1) -> int:
     """
     Gets a random number between a given range.
     """
 
+    from random import randrange
+
     min, max, step = (
         get_int(min, error="invalid args"),
         get_int(max, error="invalid args"),
@@ -289,7 +337,7 @@ async def member(ctx: YnaFunctionContext, key: str, name: str) -> None:
     All objects saved this way are strings.
     """
 
-    member = ctx.base_ctx.get_member_named(name)
+    member = await ctx.root_ctx.get_member_named(name)
     if not member:
         raise YnaError("not found")
 
@@ -300,6 +348,92 @@ async def member(ctx: YnaFunctionContext, key: str, name: str) -> None:
 def _empty_cb(ctx: YnaBaseContext) -> None:
     pass
 
+def _numbers(compare: FunctionType) -> FunctionType:
+    def condition(arg1: Any, arg2: Any) -> bool:
+        return compare(
+            get_int(arg1, error="args must be numbers", source_function="when"),
+            get_int(arg2, error="args must be numbers", source_function="when"),
+        )
+    return condition
+
+def _is_in(arg1: Any, arg2: Any) -> bool:
+    try:
+        if "," in arg2:
+            arg2 = arg2.split(",")
+        return arg1 in arg2
+    except ValueError as e:
+        raise YnaError("args do not support in", source_function="when") from e
+    except TypeError as e:
+        raise YnaError("args do not support in", source_function="when") from e
+
+def _is(arg1: Any, arg2: Any) -> bool:
+    return when_type(arg2)(arg1)
+
+def _castable(cast: FunctionType) -> FunctionType:
+    def condition(arg1: Any) -> bool:
+        try:
+            cast(arg1)
+        except ValueError:
+            return False
+        return True
+    return condition
+
+# The condition of each when operator, taking arg1 and arg2.
+_WHEN_OPCODES = {
+    YnaWhenOperator.EQUAL.value: operator.eq,
+    YnaWhenOperator.NOT_EQUAL.value: operator.ne,
+    YnaWhenOperator.LESSER_THAN.value: _numbers(operator.lt),
+    YnaWhenOperator.LESSER_THAN_OR_EQUAL.value: _numbers(operator.le),
+    YnaWhenOperator.GREATER_THAN.value: _numbers(operator.gt),
+    YnaWhenOperator.GREATER_THAN_OR_EQUAL.value: _numbers(operator.ge),
+    YnaWhenOperator.IS_IN.value: _is_in,
+    YnaWhenOperator.IS.value: _is,
+}
+
+# The check of each type of the is operator, taking arg1.
+_WHEN_TYPES = {
+    # https://stackoverflow.com/a/27280836
+    YnaWhenTypes.WORD.value: lambda arg1: _len(arg1.split()) == 1,
+    YnaWhenTypes.LETTER.value: lambda arg1: arg1.isalpha(),
+    YnaWhenTypes.NUMBER.value: _castable(int),
+    YnaWhenTypes.DECIMAL.value: _castable(float),
+    YnaWhenTypes.ERROR.value: is_yna_error,
+}
+
+@lru_cache(maxsize=128)
+def _regex_type(pattern: str) -> FunctionType:
+    import re
+    try:
+        match = re.compile(pattern).match
+    except re.error as e:
+        raise YnaError("invalid regex", source_function="when") from e
+    return lambda arg1: bool(match(arg1))
+
+def when_opcode(op: str) -> FunctionType:
+    """
+    Resolves a when operator to its condition, taking arg1 and arg2.
+    Not a YNA function; a compiler seeing a literal operator resolves it
+    once instead of on every evaluation.
+    """
+
+    condition = _WHEN_OPCODES.get(op)
+    if condition is None:
+        raise YnaError("invalid op", source_function="when")
+    return condition
+
+def when_type(name: str) -> FunctionType:
+    """
+    Resolves the type name, or /regex/, of the is operator to its
+    check, taking arg1.
+    """
+
+    check = _WHEN_TYPES.get(name)
+    if check is not None:
+        return check
+    if name.startswith("/") and name.endswith("/"):
+        return _regex_type(name[1:-1])
+    raise YnaError("invalid type name", source_function="when")
+
 # special case: interpreter evaluates on_true and on_false to functions
 @yna_function
 async def when(ctx: YnaFunctionContext, arg1: Any, op: YnaWhenOperator, arg2: Any | YnaWhenTypes, on_true: FunctionType, on_false: Optional[FunctionType] = None) -> Optional[Any]:
@@ -309,71 +443,17 @@ async def when(ctx: YnaFunctionContext, arg1: Any, op: YnaWhenOperator, arg2: An
 
     on_false = on_false and on_false or _empty_cb
 
-    condition = False
-    match op:
-        case YnaWhenOperator.EQUAL.value:
-            condition = arg1 == arg2
-        case YnaWhenOperator.NOT_EQUAL.value:
-            condition = arg1 != arg2
-        case YnaWhenOperator.LESSER_THAN.value:
-            condition = get_int(arg1, error="args must be numbers") < get_int(arg2, error="args must be numbers")
-        case YnaWhenOperator.LESSER_THAN_OR_EQUAL.value:
-            condition = get_int(arg1, error="args must be numbers") <= get_int(arg2, error="args must be numbers")
-        case YnaWhenOperator.GREATER_THAN.value:
-            condition = get_int(arg1, error="args must be numbers") > get_int(arg2, error="args must be numbers")
-        case YnaWhenOperator.GREATER_THAN_OR_EQUAL.value:
-            condition = get_int(arg1, error="args must be numbers") >= get_int(arg2, error="args must be numbers")
-        case YnaWhenOperator.IS_IN.value:
-            try:
-                if "," in arg2:
-                    arg2 = arg2.split(",")
-                condition = arg1 in arg2
-            except ValueError as e:
-                raise YnaError("args do not support in") from e
-            except TypeError as e:
-                raise YnaError("args do not support in") from e
-        case YnaWhenOperator.IS.value:
-            match arg2:
-                case YnaWhenTypes.WORD.value:
-                    # https://stackoverflow.com/a/27280836
-                    condition = _len(arg1.split()) == 1
-                case YnaWhenTypes.LETTER.value:
-                    condition = arg1.isalpha()
-                case YnaWhenTypes.NUMBER.value:
-                    condition = True
-                    try:
-                        int(arg1)
-                    except ValueError:
-                        condition = False
-                case YnaWhenTypes.DECIMAL.value:
-                    condition = True
-                    try:
-                        float(arg1)
-                    except ValueError:
-                        condition = False
-                case YnaWhenTypes.ERROR.value:
-                    condition = is_yna_error(arg1)
-                case _:
-                    if arg2.startswith("/") and arg2.endswith("/"):
-                        try:
-                            condition = bool(re.match(arg1[1:-1], arg1))
-                        except re.error as e:
-                            raise YnaError("invalid regex") from e
-                    else:
-                        raise YnaError("invalid type name")
-        case _:
-            raise YnaError("invalid op")
-
-    if condition:
-        return on_true(ctx.base_ctx)
+    if when_opcode(op)(arg1, arg2):
+        return await _evaluate_option(ctx, on_true)
     else:
-        return on_false(ctx.base_ctx)
+        return await _evaluate_option(ctx, on_false)
 
 # special case:
 #   - interpreter evaluates content to a function
-#   - handles this generator
+#   - the iterations are rendered into the buffer of the loop, and
+#     returned joined
 @yna_function
-async def loop(ctx: YnaFunctionContext, args: ParamString, content: FunctionType) -> Optional[any]:
+async def loop(ctx: YnaFunctionContext, args: ParamString, content: FunctionType) -> str:
     """
     Flow control, similar to "for" loops.
     Whilst inside the loop, your current loopcount will be stored in the {iter} variable. Note: This will be deleted when a loop is exited.
@@ -382,30 +462,56 @@ async def loop(ctx: YnaFunctionContext, args: ParamString, content: FunctionType
     """
 
     context = YnaSubContext(ctx.base_ctx)
+    loop_range = _loop_range(args)
+
+    # iter is local to the loop: it is set on the shared variables
+    # directly, not recorded as a write, and the value of an outer
+    # loop is put back once done
+    variables = context.variables
+    outer = variables.get("iter", _NO_ITER)
+    try:
+        for i in loop_range:
+            variables["iter"] = i
+            result = content(context)
+            if hasattr(result, "__await__"):
+                result = await result
+            context.write(result)
+    finally:
+        if outer is _NO_ITER:
+            variables.pop("iter", None)
+        else:
+            variables["iter"] = outer
+
+    return context.output.take()
+
+_NO_ITER = object()
+
+def _loop_range(args: ParamString) -> range:
+    """
+    Parses the arguments of loop into the range it iterates over.
+    """
 
     args = args.split(",")
 
-    if _len(args) <= 0 or _len(args) > 3:
-        raise YnaError("invalid args")
+    if _len(args) > 3:
+        raise YnaError("invalid args", source_function="loop")
 
-    b = None
-    e = None
-    s = None
+    # end, begin,end or begin,end,step; begin and step default to 1
     if _len(args) == 1:
-        e = get_int(args, error="non int index")
+        b, e, s = "", args[0], ""
+    elif _len(args) == 2:
+        (b, e), s = args, ""
     else:
         b, e, s = args
-        b, e, s = (
-            b and get_int(b, error="non int index") or 1,
-            get_int(e, error="non int index"),
-            s and get_int(s, error="non int index") or 1
-        )
+    b, e, s = (
+        get_int(b, error="non int index", source_function="loop") if b else 1,
+        get_int(e, error="non int index", source_function="loop"),
+        get_int(s, error="non int index", source_function="loop") if s else 1
+    )
+    if s == 0:
+        raise YnaError("zero step", source_function="loop")
 
-    for i in range(b, e, s):
-        # TODO: prevent iter from leaking out
-        # see also YnaSubContext init
-        context.set_variable("iter", i)
-        yield content(context)
+    return range(b, e, s)
 
 @yna_function
 async def rep(ctx: YnaFunctionContext, var: str, *args: FunctionArguments) -> str:
@@ -415,11 +521,39 @@ async def rep(ctx: YnaFunctionContext, var: str, *args: FunctionArguments) -> st
     Switching between the two is done by setting the {newrep} variable.
     """
 
-    if ctx.root_ctx.new_replace:
+    in_str, with_str = _rep_operands(ctx, args)
+    return in_str.replace(var, with_str)
+
+def _rep_operands(ctx: YnaFunctionContext, args: FunctionArguments) -> tuple[str, str]:
+    # read as a variable, so that the output depends on it
+    if ctx.base_ctx.get_variable("newrep"):
         with_str, in_str = args
     else:
         in_str, with_str = args
-    return in_str.replace(var, with_str)
+    return in_str, with_str
+
+async def rep_chain(ctx: YnaFunctionContext, content: str, *links: tuple) -> str:
+    """
+    Evaluates nested rep calls over the same content in one pass.
+    Not a YNA function; used in place of a chain like
+    {rep:a|4|{rep:e|3|content}}.
+
+    Each link holds the arguments of one rep call, innermost first, with
+    None in the place of the nested call. Which argument is the content
+    is decided by {newrep} as in rep, so the result is the same under
+    both syntaxes.
+    """
+
+    pairs = []
+    for var, *args in links:
+        in_str, with_str = _rep_operands(ctx, args)
+        if in_str is None:
+            pairs.append((var, with_str))
+        else:
+            # the nested call is the replacement, not the content
+            content = in_str.replace(var, replace_many(content, pairs))
+            pairs = []
+    return replace_many(content, pairs)
 
 @yna_function
 async def split(ctx: YnaFunctionContext, var: str, content: str, sep: str = ",") -> int:
@@ -429,11 +563,95 @@ async def split(ctx: YnaFunctionContext, var: str, content: str, sep: str = ",")
     This function returns the total number of elements (which is by definition the highest valid output index.)
     """
 
-    result = content.split(sep)
-    for i in range(_len(result)):
-        ctx.base_ctx.set_variable(var + str(i), result[i])
+    if not sep:
+        raise YnaError("empty sep")
+
+    # the elements are sliced out when read, see YnaBaseContext.get_variable
+    result = YnaSplitView(content, sep)
+    ctx.base_ctx.set_split_view(var, result)
     return _len(result)
 
+class _MathOpcode(object):
+
+    """
+    A math operator resolved ahead of time: the number of arguments it
+    takes, what they are parsed to and the operation itself.
+    """
+
+    __slots__ = ("name", "arity", "is_int", "operation")
+
+    def __init__(self, name: str, arity: int, is_int: bool, operation: FunctionType) -> None:
+        self.name = name
+        self.arity = arity
+        self.is_int = is_int
+        self.operation = operation
+
+    def parse(self, args: tuple) -> list[int | float]:
+        """
+        Checks and parses the arguments. A compiler can do this once
+        for literal arguments and only call apply when evaluating.
+        """
+
+        if _len(args) < self.arity:
+            raise YnaError("invalid args", source_function="math")
+        if self.is_int:
+            return [get_int(i, error="non-int args", source_function="math") for i in args]
+        return [get_float(i, error="non-float args", source_function="math") for i in args]
+
+    def apply(self, values: list[int | float]) -> int | float:
+        try:
+            resolution = self.operation(values)
+        except ZeroDivisionError as e:
+            raise YnaError("divide by 0", source_function="math") from e
+
+        if resolution >= inf:
+            raise YnaError("inf", source_function="math")
+        elif resolution <= -inf:
+            raise YnaError("-inf", source_function="math")
+
+        return resolution
+
+    def __call__(self, args: tuple) -> int | float:
+        return self.apply(self.parse(args))
+
+def _fold(operation: FunctionType) -> FunctionType:
+    return lambda values: reduce(operation, values)
+
+# The math operators and their aliases, e.g. add and +, not and ~
+_MATH_OPCODES: dict[str, _MathOpcode] = {}
+for _op, _aliases, _arity, _is_int, _operation in (
+    (YnaMathOperator.ADD, ("+",), 2, False, _fold(operator.add)),
+    (YnaMathOperator.SUB, ("-",), 2, False, lambda values: values[0] - values[1]),
+    (YnaMathOperator.MUL, ("*",), 2, False, _fold(operator.mul)),
+    (YnaMathOperator.DIV, ("/", "/f"), 2, False, lambda values: values[0] / values[1]),
+    (YnaMathOperator.IDIV, ("//",), 2, True, lambda values: values[0] // values[1]),
+    (YnaMathOperator.MOD, ("%",), 2, True, lambda values: values[0] % values[1]),
+    (YnaMathOperator.POW, ("**",), 2, False, lambda values: values[0] ** values[1]),
+    (YnaMathOperator.AND, ("&",), 2, True, _fold(operator.and_)),
+    (YnaMathOperator.OR, ("|",), 2, True, _fold(operator.or_)),
+    (YnaMathOperator.XOR, ("^",), 2, True, lambda values: values[0] ^ values[1]),
+    (YnaMathOperator.NOT, ("~",), 1, True, lambda values: ~values[0]),
+    (YnaMathOperator.MAX, (), 2, False, lambda values: max(*values)),
+    (YnaMathOperator.MIN, (), 2, False, lambda values: min(*values)),
+    (YnaMathOperator.FLOOR, (), 1, False, lambda values: floor(values[0])),
+    (YnaMathOperator.CEIL, (), 1, False, lambda values: ceil(values[0])),
+    (YnaMathOperator.ROUND, (), 1, False, lambda values: round(values[0])),
+):
+    _MATH_OPCODES[_op.value] = _MathOpcode(_op.value, _arity, _is_int, _operation)
+    for _alias in _aliases:
+        _MATH_OPCODES[_alias] = _MATH_OPCODES[_op.value]
+del _op, _aliases, _arity, _is_int, _operation
+
+def math_opcode(op: str) -> Optional[_MathOpcode]:
+    """
+    Resolves a math operator or alias, or returns None if there is no
+    such operator.
+    Not a YNA function; a compiler seeing a literal operator resolves it
+    once instead of on every evaluation.
+    """
+
+    return _MATH_OPCODES.get(op)
+
 @yna_function
 async def math(ctx: YnaFunctionContext, op: YnaMathOperator, *args: tuple[int | float]) -> int | float:
     """
@@ -447,130 +665,10 @@ async def math(ctx: YnaFunctionContext, op: YnaMathOperator, *args: tuple[int |
     if not args or _len(args) < 1:
         raise YnaError("no args")
 
-    args = list(copy(args))
-    _func_name = "math"
-    def ensure_arg_amount(len):
-        if _len(args) < len:
-            raise YnaError("invalid args", source_function=_func_name)
-    def ensure_args_float():
-        for i in range(_len(args)):
-            args[i] = get_float(args[i], error="non-float args", source_function=_func_name)
-    def ensure_args_int():
-        for i in range(_len(args)):
-            args[i] = get_int(args[i], error="non-int args", source_function=_func_name)
-
-    # aliases
-    match op:
-        case "+":
-            op = YnaMathOperator.ADD.value
-        case "-":
-            op = YnaMathOperator.SUB.value
-        case "*":
-            op = YnaMathOperator.MUL.value
-        case "/":
-            op = YnaMathOperator.DIV.value
-        case "/f":
-            op = YnaMathOperator.DIV.value
-        case "//":
-            op = YnaMathOperator.IDIV.value
-        case "%":
-            op = YnaMathOperator.MOD.value
-        case "**":
-            op = YnaMathOperator.POW.value
-        case "&":
-            op = YnaMathOperator.AND.value
-        case "|":
-            op = YnaMathOperator.OR.value
-        case "^":
-            op = YnaMathOperator.XOR.value
-        case "~":
-            op = YnaMathOperator.NOT.value
-
-    try:
-        match op:
-            case YnaMathOperator.ADD.value:
-                ensure_arg_amount(2)
-                ensure_args_float()
-                resolution = args[0]
-                for i in args[1:]:
-                    resolution += i
-            case YnaMathOperator.SUB.value:
-                ensure_arg_amount(2)
-                ensure_args_float()
-                resolution = args[0] - args[1]
-            case YnaMathOperator.MUL.value:
-                ensure_arg_amount(2)
-                ensure_args_float()
-                resolution = args[0]
-                for i in args[1:]:
-                    resolution *= i
-            case YnaMathOperator.DIV.value:
-                ensure_arg_amount(2)
-                ensure_args_float()
-                resolution = args[0] / args[1]
-            case YnaMathOperator.IDIV.value:
-                ensure_arg_amount(2)
-                ensure_args_int()
-                resolution = args[0] // args[1]
-            case YnaMathOperator.MOD.value:
-                ensure_arg_amount(2)
-                ensure_args_int()
-                resolution = args[0] % args[1]
-            case YnaMathOperator.POW.value:
-                ensure_arg_amount(2)
-                ensure_args_float()
-                resolution = args[0] ** args[1]
-            case YnaMathOperator.AND.value:
-                ensure_arg_amount(2)
-                ensure_args_int()
-                resolution = args[0]
-                for i in args[1:]:
-                    resolution &= i
-            case YnaMathOperator.OR.value:
-                ensure_arg_amount(2)
-                ensure_args_int()
-                resolution = args[0]
-                for i in args[1:]:
-                    resolution |= i
-            case YnaMathOperator.XOR.value:
-                ensure_arg_amount(2)
-                ensure_args_int()
-                resolution = args[0] ^ args[1]
-            case YnaMathOperator.NOT.value:
-                ensure_arg_amount(1)
-                ensure_args_int()
-                resolution = ~args[0]
-            case YnaMathOperator.MAX.value:
-                ensure_arg_amount(2)
-                ensure_args_float()
-                resolution = max(*args)
-            case YnaMathOperator.MIN.value:
-                ensure_arg_amount(2)
-                ensure_args_float()
-                resolution = min(*args)
-            case YnaMathOperator.FLOOR.value:
-                ensure_arg_amount(1)
-                ensure_args_float()
-                resolution = floor(args[0])
-            case YnaMathOperator.CEIL.value:
-                ensure_arg_amount(1)
-                ensure_args_float()
-                resolution = ceil(args[0])
-            case YnaMathOperator.ROUND.value:
-                ensure_arg_amount(1)
-                ensure_args_float()
-                resolution = round(args[0])
-            case _:
-                raise YnaError("unknon op")
-    except ZeroDivisionError as e:
-        raise YnaError("divide by 0") from e
-
-    if resolution >= inf:
-        raise YnaError("inf")
-    elif resolution <= -inf:
-        raise YnaError("-inf")
-
-    return resolution
+    opcode = _MATH_OPCODES.get(op)
+    if opcode is None:
+        raise YnaError("unknon op")
+    return opcode(args)
 
 # oneline is special case in parser
 
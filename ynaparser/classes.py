@@ -1,15 +1,27 @@
-import inspect
-from typing import Optional, Any
-from .fake_discord import Context as DiscordContext
-from .fake_discord import Member
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional, Any
+import sys
+
+if TYPE_CHECKING:
+    from .fake_discord import Context as DiscordContext
+    from .fake_discord import Member
+    from .members import YnaMemberLoader
 
 __all__ = [
     "YnaBareContext", "YnaBaseContext",
     "YnaRootContext", "YnaSubContext",
     "YnaFunctionContext",
+    "YnaOutput", "YnaSplitView",
+    "YnaDependencies",
     "YnaError",
 ] 
 
+# Discord refuses messages longer than this.
+DEFAULT_MAX_OUTPUT_LENGTH = 2000
+
+# Stored in place of a split element that was unset, see set_variable.
+_UNSET = object()
+
 class YnaBareContext(object):
 
     """
@@ -23,36 +35,135 @@ class YnaBaseContext(YnaBareContext):
     TODO
     """
 
-    variables: list[str] = []
+    # The variables of the context, shared with its sub contexts.
+    variables: dict[str, Any]
+
+    # Where what is written in the context goes. A sub context has a
+    # buffer of its own, taken by whoever evaluated it.
+    output: "YnaOutput" = None
+
+    def __init__(self) -> None:
+        # Every piece of render state lives on the instance, so that
+        # renders running concurrently never see each other's state.
+        self.variables = {}
 
     def set_variable(self, name, value):
         # todo: check name vaildity
 
+        dependencies = self.root_ctx.dependencies
+        if dependencies is not None:
+            dependencies.writes.add(name)
         if name == "newrep":
             self.root_ctx.new_replace = value
         if value is None:
-            self.variables.pop(name)
+            if self._find_split_element(name) is not None:
+                # hide the element instead, there is no variable to remove
+                self.variables[name] = _UNSET
+            else:
+                self.variables.pop(name, None)
             return
         self.variables[name] = value
 
+    def get_variable(self, name, default=None):
+        """
+        Gets the value of a variable.
+        The read is recorded into the dependencies of the segment being
+        rendered, if the root context is tracking them.
+        """
+
+        dependencies = self.root_ctx.dependencies
+        if dependencies is not None:
+            dependencies.reads.add(name)
+        return self.peek_variable(name, default)
+
+    def peek_variable(self, name, default=None):
+        """
+        Gets the value of a variable without recording the read.
+        """
+
+        if name in self.variables:
+            value = self.variables[name]
+            return default if value is _UNSET else value
+
+        element = self._find_split_element(name)
+        if element is None:
+            return default
+        view, index = element
+        return view[index]
+
+    def _find_split_element(self, name: str) -> Optional[tuple["YnaSplitView", int]]:
+        """
+        Finds the split element <prefix><index> a variable name refers to.
+        Splits with a longer prefix are tried first, so that after
+        splitting into both v and v1, v12 is the 2nd element of v1.
+        """
+
+        split_views = self.root_ctx.split_views
+        if not split_views:
+            return None
+        for prefix in sorted((p for p in split_views if name.startswith(p)), key=len, reverse=True):
+            index = name[len(prefix):]
+            if not (index.isascii() and index.isdigit()) or (index[0] == "0" and len(index) > 1):
+                continue
+            view = split_views[prefix]
+            index = int(index)
+            if index < len(view):
+                return view, index
+        return None
+
+    def set_split_view(self, prefix: str, view: "YnaSplitView") -> None:
+        """
+        Makes the elements of view readable as <prefix>0, <prefix>1, ...
+        Replaces the variables and the previous split with the same
+        names.
+        """
+
+        dependencies = self.root_ctx.dependencies
+        if dependencies is not None:
+            dependencies.writes.add(prefix)
+        self.root_ctx.split_views[prefix] = view
+        for name in [name for name in self.variables if name.startswith(prefix)]:
+            element = self._find_split_element(name)
+            if element is not None and element[0] is view:
+                del self.variables[name]
+
+    def write(self, value: Any) -> None:
+        """
+        Appends a piece of evaluated content to the output of the
+        context.
+        """
+
+        self.output.write(value)
+
 class YnaRootContext(YnaBaseContext):
 
     """
     TODO
     """
 
-    discord_ctx: Any | DiscordContext = None
+    discord_ctx: "Any | DiscordContext" = None
 
     # The base context of the context.
     base_ctx: YnaBaseContext = None
     # The root context of the context.
     root_ctx: YnaBaseContext = None
 
-    new_replace = False
+    # Whether rep uses the new argument order, see {newrep}.
+    new_replace: bool = False
+
+    # What the segment being rendered depends on, or None if it is not
+    # being tracked. Set through track_dependencies so a cached segment
+    # is only re-evaluated when it may render differently.
+    dependencies: Optional["YnaDependencies"] = None
+
+    # The results of split, by variable prefix.
+    split_views: dict[str, "YnaSplitView"] = None
 
-    def __init__(self, discord_ctx: Any | DiscordContext) -> None:
+    def __init__(self, discord_ctx: "Any | DiscordContext", max_output_length: Optional[int] = DEFAULT_MAX_OUTPUT_LENGTH, member_loader: Optional["YnaMemberLoader"] = None) -> None:
         """
         Initalizes the context with ctx as the parent context.
+        Pass the same member_loader to concurrent renders to coalesce
+        their member lookups.
         """
 
         super().__init__()
@@ -60,27 +171,61 @@ class YnaRootContext(YnaBaseContext):
         self.discord_ctx = discord_ctx
         self.base_ctx = self
         self.root_ctx = self
+        self.new_replace = False
+        self.dependencies = None
+        self.output = YnaOutput(max_output_length)
+        self.split_views = {}
+        self._member_loader = member_loader
+
+    @contextmanager
+    def track_dependencies(self) -> Iterator["YnaDependencies"]:
+        """
+        Tracks the dependencies of a segment rendered inside the with
+        block, into the YnaDependencies it yields.
+        Segments nest: once a nested segment is done, the outer one is
+        tracked again, and depends on everything the nested one did.
+        """
+
+        outer = self.dependencies
+        dependencies = self.dependencies = YnaDependencies()
+        try:
+            yield dependencies
+        finally:
+            self.dependencies = outer
+            if outer is not None:
+                outer.update(dependencies)
 
     # Discord-related functions
 
-    def get_members(self) -> list:
+    @property
+    def member_loader(self) -> "YnaMemberLoader":
         """
-        Returns all members of the guild the bot is in.
-        Dummy function, returns a empty list.
+        Where the member lookups of the render go.
+        Defaults to a loader reading from the guild of discord_ctx.
         """
-        return self.discord_ctx.guild.members
 
-    def get_member(self, id: int) -> Optional[Member]:
+        if self._member_loader is None:
+            from .members import YnaGuildMemberProvider, YnaMemberLoader
+            self._member_loader = YnaMemberLoader(YnaGuildMemberProvider(self.discord_ctx.guild))
+        return self._member_loader
+
+    async def get_members(self) -> list:
         """
         Returns all members of the guild the bot is in.
         """
-        return self.discord_ctx.guild.get_member(id)
+        return await self.member_loader.load_all()
+
+    async def get_member(self, id: int) -> Optional["Member"]:
+        """
+        Returns the member of the guild with the ID provided.
+        """
+        return await self.member_loader.load(id)
 
-    def get_member_named(self, name: str) -> Optional[Member]:
+    async def get_member_named(self, name: str) -> Optional["Member"]:
         """
         Returns the first member found that matches the name provided.
         """
-        return self.discord_ctx.guild.get_member_named(id)
+        return await self.member_loader.load_named(name)
 
 class YnaSubContext(YnaBaseContext):
 
@@ -96,12 +241,9 @@ class YnaSubContext(YnaBaseContext):
         super().__init__()
 
         self.base_ctx = ctx
-        if not isinstance(ctx, YnaSubContext):
-            self.root_ctx = ctx
-        else:
-            while isinstance(self.root_ctx, YnaSubContext):
-                self.root_ctx = ctx.base_ctx
+        self.root_ctx = ctx.root_ctx
         self.variables = ctx.variables # TODO: ???
+        self.output = ctx.output.child()
 
 class YnaFunctionContext(YnaBareContext):
 
@@ -127,10 +269,7 @@ class YnaFunctionContext(YnaBareContext):
         """
 
         self.base_ctx = ctx
-        self.root_ctx = ctx
-        if isinstance(ctx, YnaSubContext):
-            while isinstance(self.root_ctx, YnaSubContext):
-                self.root_ctx = ctx.base_ctx
+        self.root_ctx = ctx.root_ctx
         self.called_as_variable = called_as_variable
         self.ret_var = ret_var
 
@@ -142,6 +281,148 @@ class YnaFunctionContext(YnaBareContext):
         return True
 
 
+class YnaOutput(object):
+
+    """
+    An append-only buffer the render result is built in.
+    Fragments are joined once when the result is taken.
+
+    The buffers of sub contexts are children of the root one and share
+    its max_length: every character held by any of them counts, until
+    it is taken out of a child. A write crossing max_length keeps the
+    part that fits, then fails straight away instead of after building
+    the whole string.
+    """
+
+    __slots__ = ("fragments", "length", "max_length", "budget", "used")
+
+    def __init__(self, max_length: Optional[int] = None, budget: Optional["YnaOutput"] = None) -> None:
+        self.fragments: list[str] = []
+        self.length = 0
+        self.max_length = max_length
+        # the buffer holding the shared max_length and the number of
+        # characters used of it
+        self.budget = budget if budget is not None else self
+        self.used = 0
+
+    def child(self) -> "YnaOutput":
+        """
+        Returns an empty buffer sharing the max_length of this one.
+        """
+
+        return YnaOutput(budget=self.budget)
+
+    def write(self, value: Any) -> None:
+        if value is None:
+            return
+        value = str(value)
+        budget = self.budget
+        used = budget.used + len(value)
+        if budget.max_length is not None and used > budget.max_length:
+            value = value[:budget.max_length - budget.used]
+            if value:
+                self.fragments.append(value)
+                self.length += len(value)
+            budget.used = budget.max_length
+            raise YnaError("output too long", source_function="output")
+        self.fragments.append(value)
+        self.length += len(value)
+        budget.used = used
+
+    def take(self) -> str:
+        """
+        Empties the buffer and returns what it held, giving its length
+        back to the shared max_length.
+        """
+
+        value = self.getvalue()
+        self.budget.used -= self.length
+        self.fragments = []
+        self.length = 0
+        return value
+
+    def getvalue(self) -> str:
+        if len(self.fragments) > 1:
+            self.fragments[:] = ["".join(self.fragments)]
+        return self.fragments and self.fragments[0] or ""
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        return self.getvalue()
+
+class YnaSplitView(object):
+
+    """
+    The elements of a split string, sliced out on demand.
+    The number of elements is known up front; the separator offsets are
+    found once, on the first element read.
+    """
+
+    __slots__ = ("content", "sep", "count", "offsets")
+
+    def __init__(self, content: str, sep: str) -> None:
+        self.content = content
+        self.sep = sep
+        self.count = content.count(sep) + 1
+        self.offsets: Optional[list[int]] = None
+
+    def _find_offsets(self) -> list[int]:
+        content, sep = self.content, self.sep
+        offsets = []
+        find = content.find
+        i = find(sep)
+        while i != -1:
+            offsets.append(i)
+            i = find(sep, i + len(sep))
+        self.offsets = offsets
+        return offsets
+
+    def __getitem__(self, index: int) -> str:
+        offsets = self.offsets
+        if offsets is None:
+            offsets = self._find_offsets()
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("split index out of range")
+        start = offsets[index - 1] + len(self.sep) if index > 0 else 0
+        end = offsets[index] if index < len(offsets) else len(self.content)
+        return self.content[start:end]
+
+    def __len__(self) -> int:
+        return self.count
+
+class YnaDependencies(object):
+
+    """
+    What a segment of a render depends on: the variables it read, the
+    ones it wrote, split prefixes included, and whether it called a
+    function decorated with nondeterministic.
+    """
+
+    __slots__ = ("reads", "writes", "nondeterministic")
+
+    def __init__(self) -> None:
+        self.reads: set[str] = set()
+        self.writes: set[str] = set()
+        self.nondeterministic = False
+
+    def update(self, other: "YnaDependencies") -> None:
+        self.reads |= other.reads
+        self.writes |= other.writes
+        self.nondeterministic = self.nondeterministic or other.nondeterministic
+
+    def cacheable(self) -> bool:
+        """
+        Whether the output of the segment may be reused while the
+        variables it read keep their values. A segment with side
+        effects or a nondeterministic call has to run every time.
+        """
+
+        return not self.writes and not self.nondeterministic
+
 class YnaError(Exception):
     """
     An error that ocurred when running a YNA function.
@@ -152,7 +433,7 @@ class YnaError(Exception):
 
     def __init__(self, *args: tuple, source_function: str | None = None) -> None:
         super().__init__(*args)
-        self.source_function = source_function and source_function or inspect.getouterframes(inspect.currentframe(), 2)[1].function
+        self.source_function = source_function and source_function or sys._getframe(1).f_code.co_name
 
     def __str__(self) -> str:
         return self.source_function and "<%s:%s>" % (self.source_function, super().__str__()) or "<%s>" % (super().__str__())
\ No newline at end of file
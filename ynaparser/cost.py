@@ -0,0 +1,321 @@
+"""
+Static cost estimation of templates, for admission control.
+
+A template is a list of parts, each either plain text or a function
+call. A call is a list of the function name followed by its arguments,
+each either a literal string or a template of its own, e.g.
+
+    ["Hi ", ["loop", "1,4,1", ["x"]], ["upper", [["nameof", "1"]]]]
+
+A call without arguments of a name that is not a function reads the
+variable of that name, and is bounded by the longest value set to it
+earlier in the template.
+
+which is also the form ynaparser.loadtest replays. Every bound comes from literal arguments only; where a bound
+depends on a value known at render time, it is inf and the template is
+flagged. So is anything that is neither text nor a call.
+"""
+
+from math import inf, isfinite, log10
+from typing import Optional, Union
+
+from .classes import DEFAULT_MAX_OUTPUT_LENGTH, YnaError
+from ._functions import _loop_range, math_opcode, YnaMathOperator
+from .interpreter import is_function
+
+__all__ = ["YnaCost", "DEFAULT_MAX_CALLS", "estimate", "check"]
+
+Template = list[Union[str, list]]
+
+# Function calls a template may make before it is rejected.
+DEFAULT_MAX_CALLS = 10000
+
+# The longest a member attribute can be: a 32 character name,
+# "#" and a 4 digit discriminator.
+MEMBER_ATTR_LENGTH = 37
+# The longest str() of a float.
+FLOAT_LENGTH = 24
+# The math operators turning a float into an int.
+ROUNDING_OPS = frozenset({YnaMathOperator.FLOOR.value, YnaMathOperator.CEIL.value, YnaMathOperator.ROUND.value})
+# The most characters a single character can turn into with
+# upper, lower or title.
+CASE_GROWTH = 3
+# The most characters a single character can turn into with parse,
+# 4 UTF-8 bytes as %XX each.
+URLENCODE_GROWTH = 12
+# The most characters a single character of a time template can turn
+# into, e.g. %c.
+TIME_GROWTH = 12
+
+class YnaCost(object):
+
+    """
+    Upper bounds on the work and output of rendering a template.
+    """
+
+    # Function calls evaluated.
+    calls: float = 0
+    # Characters of output.
+    output: float = 0
+    # Why the template may be unbounded or fail, one line each.
+    findings: list[str] = None
+
+    def __init__(self, calls: float = 0, output: float = 0, findings: Optional[list[str]] = None) -> None:
+        self.calls = calls
+        self.output = output
+        self.findings = findings is not None and findings or []
+
+    def __repr__(self) -> str:
+        return "<YnaCost calls=%s output=%s findings=%r>" % (self.calls, self.output, self.findings)
+
+class _Estimator(object):
+
+    def __init__(self) -> None:
+        self.findings = []
+        # the longest value set to each variable so far
+        self.variables: dict[str, float] = {}
+
+    def template(self, parts: Template) -> tuple[float, float]:
+        if not isinstance(parts, list):
+            self.findings.append("malformed template %r" % (parts,))
+            return inf, inf
+        calls = output = 0
+        for part in parts:
+            if isinstance(part, str):
+                output += len(part)
+            elif isinstance(part, list):
+                part_calls, part_output = self.call(part)
+                calls += part_calls
+                output += part_output
+            else:
+                self.findings.append("malformed part %r" % (part,))
+                return inf, inf
+        return calls, output
+
+    def arg(self, arg: Union[str, Template]) -> tuple[float, float, Optional[str]]:
+        """
+        Returns the calls and output length of an argument, and its
+        value if it is a literal.
+        """
+        if isinstance(arg, str):
+            return 0, len(arg), arg
+        return (*self.template(arg), None)
+
+    def call(self, call: list) -> tuple[float, float]:
+        if not call or not isinstance(call[0], str):
+            self.findings.append("malformed call %r" % (call,))
+            return inf, inf
+        name, *args = call
+        if not args and not is_function(name):
+            return 0, self.variable(name)
+        handler = getattr(self, "call_" + name, None)
+        if handler is None:
+            self.findings.append("unknown function %r" % name)
+            return inf, inf
+        calls, output = handler(args)
+        return 1 + calls, output
+
+    def variable(self, name: str) -> float:
+        length = self.variables.get(name)
+        if length is None:
+            self.findings.append("variable %r is not set in the template" % name)
+            return inf
+        return length
+
+    def args(self, args: list) -> tuple[float, list[float], list[Optional[str]]]:
+        calls = 0
+        lengths = []
+        values = []
+        for arg in args:
+            arg_calls, length, value = self.arg(arg)
+            calls += arg_calls
+            lengths.append(length)
+            values.append(value)
+        return calls, lengths, values
+
+    # Flow control
+
+    def call_loop(self, args: list) -> tuple[float, float]:
+        if len(args) != 2:
+            self.findings.append("loop: takes 2 arguments, got %d" % len(args))
+            return self.args(args)[0], 0
+        range_calls, _, value = self.arg(args[0])
+        if value is None:
+            self.findings.append("loop: iteration count is not a literal")
+            iterations = iter_length = inf
+        else:
+            try:
+                loop_range = _loop_range(value)
+            except YnaError:
+                # fails at render time before running the body
+                loop_range = range(0)
+            iterations = _range_length(loop_range)
+            iter_length = max(len(str(loop_range.start)), len(str(loop_range.stop)))
+        # iter is only set inside the loop
+        outer = self.variables.get("iter")
+        self.variables["iter"] = iter_length
+        body_calls, body_output = self.arg(args[1])[:2]
+        if outer is None:
+            del self.variables["iter"]
+        else:
+            self.variables["iter"] = outer
+        # every iteration counts as a call, even with a text-only body
+        return range_calls + _mul(iterations, 1 + body_calls), _mul(iterations, body_output)
+
+    def call_when(self, args: list) -> tuple[float, float]:
+        if not 4 <= len(args) <= 5:
+            self.findings.append("when: takes 4 or 5 arguments, got %d" % len(args))
+        calls = self.args(args[:3])[0]
+        branches = [self.arg(arg)[:2] for arg in args[3:5]] or [(0, 0)]
+        return calls + max(c for c, _ in branches), max(o for _, o in branches)
+
+    def call_choose(self, args: list) -> tuple[float, float]:
+        # only the chosen option is evaluated
+        options = [self.arg(arg)[:2] for arg in args] or [(0, 0)]
+        return max(c for c, _ in options), max(o for _, o in options)
+
+    def call_wchoose(self, args: list) -> tuple[float, float]:
+        calls = self.args(args[1::2])[0]
+        options = [self.arg(arg)[:2] for arg in args[::2]] or [(0, 0)]
+        return calls + max(c for c, _ in options), max(o for _, o in options)
+
+    def call_void(self, args: list) -> tuple[float, float]:
+        return self.args(args)[0], 0
+
+    # Strings
+
+    def call_rep(self, args: list) -> tuple[float, float]:
+        calls, lengths, values = self.args(args)
+        if len(args) != 3:
+            return calls, 0
+        pattern = values[0] is not None and len(values[0]) or 0
+        output = 0
+        # {newrep} decides which of the two is the content
+        for content, replacement in ((lengths[1], lengths[2]), (lengths[2], lengths[1])):
+            if pattern == 0:
+                # an empty pattern matches between every character
+                output = max(output, content + _mul(content + 1, replacement))
+            else:
+                matches = content // pattern if content != inf else inf
+                output = max(output, content + _mul(matches, max(0, replacement - pattern)))
+        return calls, output
+
+    def _case(self, args: list) -> tuple[float, float]:
+        calls, lengths, _ = self.args(args)
+        return calls, sum(lengths) * CASE_GROWTH
+
+    call_upper = call_lower = call_title = _case
+
+    def call_len(self, args: list) -> tuple[float, float]:
+        calls, lengths, _ = self.args(args)
+        return calls, _digits(sum(lengths))
+
+    def call_slice(self, args: list) -> tuple[float, float]:
+        calls, lengths, _ = self.args(args)
+        return calls, lengths[-1:] and lengths[-1] or 0
+
+    def call_parse(self, args: list) -> tuple[float, float]:
+        calls, lengths, _ = self.args(args)
+        return calls, sum(lengths) * URLENCODE_GROWTH
+
+    def call_split(self, args: list) -> tuple[float, float]:
+        calls, lengths, _ = self.args(args)
+        return calls, _digits(lengths[1:2] and lengths[1] + 1 or 1)
+
+    # Numbers
+
+    def call_num(self, args: list) -> tuple[float, float]:
+        calls, lengths, _ = self.args(args)
+        # the result is no wider than the bounds, max defaults to 100
+        return calls, max([*lengths[:2], 3])
+
+    def call_math(self, args: list) -> tuple[float, float]:
+        calls, lengths, values = self.args(args)
+        opcode = values and values[0] is not None and math_opcode(values[0]) or None
+        if opcode is not None and opcode.is_int:
+            return calls, max(lengths[1:], default=0) + 1
+        if opcode is not None and opcode.name in ROUNDING_OPS and len(values) >= 2:
+            # the result is an int as wide as the argument is large
+            value = _float(values[1])
+            if value is None:
+                self.findings.append("math %s: argument is not a literal" % opcode.name)
+                return calls, inf
+            if not isfinite(value):
+                self.findings.append("math %s: %s is not finite" % (opcode.name, values[1]))
+                return calls, 0
+            # one more for ceil or round carrying into a new digit
+            return calls, len(str(int(value))) + 1
+        if opcode is not None and opcode.name == YnaMathOperator.POW.value and len(values) >= 3:
+            base, exponent = _float(values[1]), _float(values[2])
+            if base is None:
+                self.findings.append("math pow: base is not a literal")
+            if exponent is None:
+                self.findings.append("math pow: exponent is not a literal")
+            if base is not None and exponent is not None:
+                if base == 0 and exponent < 0:
+                    self.findings.append("math pow: %s ** %s divides by zero" % (values[1], values[2]))
+                elif base != 0 and exponent * log10(abs(base)) > 308:
+                    self.findings.append("math pow: %s ** %s overflows" % (values[1], values[2]))
+        return calls, FLOAT_LENGTH
+
+    # Time and members
+
+    def call_time(self, args: list) -> tuple[float, float]:
+        calls, lengths, _ = self.args(args)
+        template = lengths[1:2] and lengths[1] or len("%H:%M")
+        return calls, template * TIME_GROWTH
+
+    def call_user(self, args: list) -> tuple[float, float]:
+        return self.args(args)[0], MEMBER_ATTR_LENGTH
+
+    call_nameof = call_user
+
+    def call_set(self, args: list) -> tuple[float, float]:
+        calls, lengths, values = self.args(args)
+        if len(args) >= 2 and values[0] is not None:
+            self.variables[values[0]] = max(self.variables.get(values[0], 0), lengths[1])
+        return calls, 0
+
+    def call_member(self, args: list) -> tuple[float, float]:
+        return self.args(args)[0], 0
+
+
+def _mul(a: float, b: float) -> float:
+    # inf * 0 is nan, but nothing repeated is still nothing
+    return a and b and a * b or 0
+
+def _range_length(r: range) -> int:
+    # len() of a range fails past sys.maxsize
+    return max(0, (r.stop - r.start + r.step - (1 if r.step > 0 else -1)) // r.step)
+
+def _digits(value: float) -> float:
+    return value == inf and inf or len(str(int(value)))
+
+def _float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def estimate(template: Template) -> YnaCost:
+    """
+    Estimates the worst-case cost of rendering a template.
+    """
+
+    estimator = _Estimator()
+    calls, output = estimator.template(template)
+    return YnaCost(calls, output, estimator.findings)
+
+def check(template: Template, max_calls: float = DEFAULT_MAX_CALLS, max_output: float = DEFAULT_MAX_OUTPUT_LENGTH) -> list[str]:
+    """
+    Returns a list of reasons to reject a template, empty if its cost
+    is bounded and within the limits.
+    """
+
+    cost = estimate(template)
+    problems = list(cost.findings)
+    if cost.calls > max_calls:
+        problems.append("makes up to %s calls, limit is %s" % (cost.calls, max_calls))
+    if cost.output > max_output:
+        problems.append("outputs up to %s characters, limit is %s" % (cost.output, max_output))
+    return problems
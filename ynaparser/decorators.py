@@ -1,5 +1,5 @@
 from types import FunctionType
-from typing import Optional
+from typing import Any, Optional
 from .classes import YnaError, YnaFunctionContext
 from functools import update_wrapper
 
@@ -22,6 +22,32 @@ def global_variable_getter(func: FunctionType) -> FunctionType:
     func.global_variable_getter = True
     return func
 
+def nondeterministic(func: FunctionType) -> FunctionType:
+    """
+    When a function has this decorator, its result may differ between
+    two calls with the same arguments, so a segment calling it must
+    always be re-evaluated instead of being taken from a cache.
+    Calling it marks the dependencies of the segment being tracked as
+    nondeterministic.
+    """
+
+    async def inner(ctx: YnaFunctionContext, *args: tuple[str], **kwargs: tuple[str]) -> Any:
+        dependencies = ctx.root_ctx.dependencies
+        if dependencies is not None:
+            dependencies.nondeterministic = True
+        return await func(ctx, *args, **kwargs)
+
+    inner = update_wrapper(inner, func)
+    inner.nondeterministic = True
+    return inner
+
+def is_nondeterministic(func: FunctionType) -> bool:
+    """
+    Checks if a function is decorated with nondeterministic.
+    """
+
+    return getattr(func, "nondeterministic", False)
+
 def result_storable(func: Optional[FunctionType] = None, *, type_clash=False) -> FunctionType:
     """
     When a function has this decorator, then when the function is invoked like:
@@ -34,12 +60,12 @@ def result_storable(func: Optional[FunctionType] = None, *, type_clash=False) ->
     as a global variable.
     """
 
-    def inner(ctx: YnaFunctionContext, *args: tuple[str], **kwargs: tuple[str]) -> str:
+    async def inner(ctx: YnaFunctionContext, *args: tuple[str], **kwargs: tuple[str]) -> str:
         # I hate squas
         if type_clash and not ctx.called_as_variable:
             raise YnaError("type clash")
 
-        ret = func(ctx, *args, **kwargs)
+        ret = await func(ctx, *args, **kwargs)
 
         if ctx.set_return(ret):
             return None
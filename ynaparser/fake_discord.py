@@ -33,9 +33,21 @@ class Member(object):
         self._user = user
         self.nick = nick
 
+    @property
+    def id(self) -> int:
+        return self._user.id
+
+    @property
+    def name(self) -> str:
+        return self._user.name
+
+    @property
+    def discriminator(self) -> str:
+        return self._user.discriminator
+
     @property
     def display_name(self) -> str:
-        return self._nick and self._nick or self._user.name
+        return self.nick and self.nick or self._user.name
 
     def __int__(self) -> int:
         return int(self._user)
@@ -0,0 +1,96 @@
+"""
+Checks that a cold `import ynaparser` stays within its budget.
+
+    python -m ynaparser.importtime [--budget MICROSECONDS] [--runs N]
+
+The import is run in fresh interpreters with `-X importtime`; the
+fastest run is compared against the budget. The check also fails when
+the package import eagerly loads one of the modules that are meant to
+be loaded lazily.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Optional
+
+__all__ = ["DEFAULT_BUDGET", "LAZY_MODULES", "measure", "check", "main"]
+
+# Cumulative import time of the package, in microseconds.
+DEFAULT_BUDGET = 5000
+
+# Modules a bare `import ynaparser` must not pull in.
+LAZY_MODULES = frozenset({
+    "ynaparser.classes", "ynaparser.functions", "ynaparser._functions",
+    "datetime", "urllib.parse", "random", "re", "enum", "copy", "inspect",
+})
+
+def measure(package: str = "ynaparser") -> tuple[int, list[str]]:
+    """
+    Imports the package in a fresh interpreter.
+    Returns the cumulative import time in microseconds and the modules
+    imported on behalf of the package.
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + package],
+        env=env, capture_output=True, text=True, check=True,
+    )
+
+    # Lines look like "import time: self | cumulative | <indent>name",
+    # children are printed before their parent with a deeper indent.
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        entries.append((len(name) - len(name.lstrip()), int(cumulative), name.strip()))
+
+    for i in range(len(entries) - 1, -1, -1):
+        indent, cumulative, name = entries[i]
+        if name != package:
+            continue
+        children = []
+        for child_indent, _, child_name in reversed(entries[:i]):
+            if child_indent <= indent:
+                break
+            children.append(child_name)
+        return cumulative, children
+    raise RuntimeError("%s was not imported" % package)
+
+def check(budget: int = DEFAULT_BUDGET, runs: int = 5) -> list[str]:
+    """
+    Returns a list of problems, empty if the import is within budget.
+    """
+
+    results = [measure() for _ in range(runs)]
+    best = min(cumulative for cumulative, _ in results)
+    problems = []
+    if best > budget:
+        problems.append("import took %dus, budget is %dus" % (best, budget))
+    eager = sorted(set().union(*(modules for _, modules in results)) & LAZY_MODULES)
+    if eager:
+        problems.append("eagerly imported: %s" % ", ".join(eager))
+    return problems
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ynaparser.importtime", description="Checks the cold import time of ynaparser.")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="budget in microseconds (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreters to try (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    problems = check(args.budget, args.runs)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if not problems:
+        print("ok")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Renders templates already broken down into text and function calls,
+in the form ynaparser.cost estimates:
+
+    ["Hi ", ["nameof", "1", "display_name"], ["loop", "1,4,1", [["iter"]]]]
+
+A call is the function name followed by its arguments, each a string or
+a template of its own. A call without arguments of a name that is not a
+function reads the variable of that name, like {iter} does.
+Bodies of loop, branches of when and options of choose and wchoose are
+passed to the function unevaluated, as functions rendering the
+template; any other nested template is rendered first.
+"""
+
+from typing import Any, Callable, Optional
+
+from . import functions
+from ._functions import __all__ as function_names
+from .classes import YnaBaseContext, YnaDependencies, YnaFunctionContext, YnaRootContext, YnaSubContext
+
+__all__ = ["LAZY_ARGS", "is_function", "render", "YnaCachedTemplate"]
+
+Template = list[Any]
+
+# Which arguments of a function are passed unevaluated, by index.
+LAZY_ARGS: dict[str, Callable[[int], bool]] = {
+    "loop": lambda i: i == 1,
+    "when": lambda i: i >= 3,
+    "choose": lambda i: True,
+    "wchoose": lambda i: i % 2 == 0,
+}
+
+def is_function(name: str) -> bool:
+    """
+    Checks if name is a YNA function.
+    """
+
+    return name in function_names and not isinstance(getattr(functions, name), type)
+
+async def render(context: YnaBaseContext, template: Template) -> None:
+    """
+    Renders a template, writing its text and the results of its calls
+    to the output of context.
+    """
+
+    ctx = YnaFunctionContext(context)
+    for part in template:
+        if isinstance(part, str):
+            context.write(part)
+            continue
+        name, *args = part
+        if not args and not is_function(name):
+            context.write(context.get_variable(name))
+            continue
+        lazy = LAZY_ARGS.get(name)
+        args = [
+            _thunk(arg) if lazy is not None and lazy(i) else await _evaluate(context, arg)
+            for i, arg in enumerate(args)
+        ]
+        context.write(await getattr(functions, name)(ctx, *args))
+
+async def _evaluate(context: YnaBaseContext, arg: str | Template) -> str:
+    if isinstance(arg, str):
+        return arg
+    sub = YnaSubContext(context)
+    await render(sub, arg)
+    return sub.output.take()
+
+def _thunk(arg: str | Template) -> Callable[[YnaBaseContext], Any]:
+    template = [arg] if isinstance(arg, str) else arg
+    return lambda context: render(context, template)
+
+class _Segment(object):
+
+    __slots__ = ("output", "reads")
+
+    def __init__(self, output: str, reads: dict[str, Any]) -> None:
+        self.output = output
+        # the value of every variable read, when it was read
+        self.reads = reads
+
+    def is_valid(self, root: YnaRootContext) -> bool:
+        return all(root.peek_variable(name) == value for name, value in self.reads.items())
+
+class YnaCachedTemplate(object):
+
+    """
+    A template rendered part by part, keeping the output of every
+    top-level part along with what it depended on.
+
+    Rendering again only re-evaluates the parts that may render
+    differently: the ones that read a variable whose value changed,
+    and the ones that can't be cached, see YnaDependencies.cacheable.
+    The output of every other part is spliced in from the last render.
+    """
+
+    __slots__ = ("template", "segments")
+
+    def __init__(self, template: Template) -> None:
+        self.template = template
+        self.segments: list[Optional[_Segment]] = [None] * len(template)
+
+    async def render(self, root: YnaRootContext) -> int:
+        """
+        Renders the template to the output of root.
+        Returns the number of parts that were evaluated.
+        """
+
+        evaluated = 0
+        for i, part in enumerate(self.template):
+            segment = self.segments[i]
+            if segment is not None and segment.is_valid(root):
+                root.write(segment.output)
+                continue
+
+            evaluated += 1
+            sub = YnaSubContext(root)
+            with root.track_dependencies() as dependencies:
+                await render(sub, [part])
+            output = sub.output.take()
+            root.write(output)
+            self.segments[i] = self._segment(root, output, dependencies)
+        return evaluated
+
+    @staticmethod
+    def _segment(root: YnaRootContext, output: str, dependencies: YnaDependencies) -> Optional[_Segment]:
+        if not dependencies.cacheable():
+            return None
+        return _Segment(output, {name: root.peek_variable(name) for name in dependencies.reads})
@@ -0,0 +1,201 @@
+"""
+Replays a corpus of YNA templates against a synthetic guild and reports
+render latency percentiles, throughput, peak RSS and error rates.
+
+    python -m ynaparser.loadtest CORPUS [--members N] [--renders N]
+                                        [--rate RPS] [--concurrency N]
+
+There is no template parser yet, so the corpus holds templates already
+broken down into text and function calls, in the form ynaparser.cost
+estimates and ynaparser.interpreter renders. It is a JSON object mapping
+a template name to its parts:
+
+    {"greet": ["Hi ", ["nameof", "1", "display_name"]],
+     "count": [["loop", "1,4,1", [["iter"], " "]]]}
+
+A template renders on a fresh root context.
+A render that raises, YnaError or otherwise, counts as an error.
+With --rate renders are due at that many per second, and the latency of
+a render counts from when it was due, including any wait for one of the
+--concurrency slots. Otherwise a render is due as soon as a slot is
+free.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from math import ceil
+from typing import Any, Optional
+
+from . import interpreter
+from .classes import YnaRootContext
+from .cost import Template
+from .interpreter import is_function
+from .fake_discord import Context, Guild, Member, User
+from .members import YnaGuildMemberProvider, YnaMemberLoader
+
+__all__ = ["make_guild", "load_corpus", "render", "run", "percentile", "peak_rss", "report", "main"]
+
+def make_guild(size: int) -> Guild:
+    """
+    Makes a guild with size members, every other one with a nick.
+    """
+
+    members = {}
+    for id in range(1, size + 1):
+        members[id] = Member(User(id, "user%d" % id, "%04d" % (id % 10000)), id % 2 and "nick%d" % id or None)
+    return Guild(members)
+
+def load_corpus(path: str) -> dict[str, Template]:
+    with open(path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    if not isinstance(corpus, dict):
+        raise ValueError("%s: expected an object of templates" % path)
+    for name, template in corpus.items():
+        _check_template(name, template)
+    return corpus
+
+def _check_template(name: str, template: Any) -> None:
+    if not isinstance(template, list):
+        raise ValueError("%s: expected a template as a list, got %r" % (name, template))
+    for part in template:
+        if isinstance(part, str):
+            continue
+        if not isinstance(part, list) or not part or not isinstance(part[0], str):
+            raise ValueError("%s: expected text or a call, got %r" % (name, part))
+        if len(part) > 1 and not is_function(part[0]):
+            raise ValueError("%s: unknown function %r" % (name, part[0]))
+        for arg in part[1:]:
+            if not isinstance(arg, str):
+                _check_template(name, arg)
+
+async def render(root: YnaRootContext, template: Template) -> None:
+    """
+    Renders a template, writing its text and the results of its calls
+    to the output.
+    """
+
+    await interpreter.render(root, template)
+
+def percentile(values: list[float], p: float) -> float:
+    """
+    Returns the p-th percentile of sorted values, nearest rank.
+    """
+
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, ceil(p / 100 * len(values)) - 1))
+    return values[rank]
+
+def peak_rss() -> Optional[int]:
+    """
+    Returns the peak resident set size of the process in bytes.
+    """
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes everywhere but macOS
+    return sys.platform == "darwin" and rss or rss * 1024
+
+async def run(corpus: dict[str, Template], guild: Guild, renders: int, rate: Optional[float] = None, concurrency: int = 64, latency: float = 0) -> dict[str, Any]:
+    """
+    Renders templates picked at random from the corpus.
+    Returns the latencies and errors of every template, and the total
+    elapsed time.
+    """
+
+    loader = YnaMemberLoader(YnaGuildMemberProvider(guild, latency=latency))
+    names = list(corpus)
+    stats = {name: {"latencies": [], "errors": 0} for name in names}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(name: str, due: float) -> None:
+        # timed from when the render was due, so that waiting for a
+        # free slot counts towards its latency
+        async with semaphore:
+            root = YnaRootContext(Context(guild), member_loader=loader)
+            try:
+                await render(root, corpus[name])
+            except Exception:
+                stats[name]["errors"] += 1
+            stats[name]["latencies"].append(time.perf_counter() - due)
+
+    started = time.perf_counter()
+    tasks = []
+    in_flight = set()
+    for i in range(renders):
+        if rate:
+            due = started + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            # a render is due once there is a free slot for it
+            if len(in_flight) >= concurrency:
+                _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            due = time.perf_counter()
+        task = asyncio.ensure_future(one(random.choice(names), due))
+        tasks.append(task)
+        in_flight.add(task)
+    await asyncio.gather(*tasks)
+    return {"templates": stats, "elapsed": time.perf_counter() - started}
+
+def report(result: dict[str, Any], file=sys.stdout) -> None:
+    total = sum(len(s["latencies"]) for s in result["templates"].values())
+    print("%-20s %8s %10s %10s %10s %8s" % ("template", "renders", "p50 ms", "p95 ms", "p99 ms", "errors"), file=file)
+    everything = []
+    for name, s in sorted(result["templates"].items()):
+        latencies = sorted(s["latencies"])
+        everything += latencies
+        count = len(latencies)
+        print("%-20s %8d %10.3f %10.3f %10.3f %7.1f%%" % (
+            name, count,
+            percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000, percentile(latencies, 99) * 1000,
+            count and s["errors"] / count * 100 or 0,
+        ), file=file)
+    everything.sort()
+    errors = sum(s["errors"] for s in result["templates"].values())
+    print("%-20s %8d %10.3f %10.3f %10.3f %7.1f%%" % (
+        "all", total,
+        percentile(everything, 50) * 1000, percentile(everything, 95) * 1000, percentile(everything, 99) * 1000,
+        total and errors / total * 100 or 0,
+    ), file=file)
+    print("throughput: %.0f renders/s" % (total / result["elapsed"]), file=file)
+    rss = peak_rss()
+    if rss is not None:
+        print("peak RSS: %.1f MiB" % (rss / 2 ** 20), file=file)
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ynaparser.loadtest", description="Replays a corpus of YNA templates and reports render latency.")
+    parser.add_argument("corpus", help="JSON file of templates, see the module docstring")
+    parser.add_argument("--members", type=int, default=1000, help="members in the synthetic guild (default: %(default)s)")
+    parser.add_argument("--renders", type=int, default=10000, help="renders to run (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=None, help="renders started per second (default: as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=64, help="renders in flight at once (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0, help="seconds every member fetch takes (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for picking templates and random functions")
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    try:
+        corpus = load_corpus(args.corpus)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not corpus:
+        print("empty corpus", file=sys.stderr)
+        return 2
+
+    result = asyncio.run(run(corpus, make_guild(args.members), args.renders, args.rate, args.concurrency, args.latency))
+    report(result)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
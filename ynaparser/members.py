@@ -0,0 +1,243 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+if TYPE_CHECKING:
+    from .fake_discord import Guild, Member
+
+__all__ = ["YnaMemberProvider", "YnaGuildMemberProvider", "YnaMemberLoader"]
+
+class YnaMemberProvider(ABC):
+
+    """
+    Where member lookups of a render end up.
+    In production this is backed by a gateway cache or REST fetches.
+    """
+
+    @abstractmethod
+    async def fetch_members(self, ids: list[int]) -> dict[int, "Member"]:
+        """
+        Fetches the members with the given IDs in one go.
+        IDs that were not found are left out of the result.
+        """
+
+    @abstractmethod
+    async def fetch_all(self) -> list["Member"]:
+        """
+        Fetches all members of the guild.
+        """
+
+    @abstractmethod
+    async def fetch_named(self, name: str) -> Optional["Member"]:
+        """
+        Fetches the first member that matches the name provided.
+        """
+
+class YnaGuildMemberProvider(YnaMemberProvider):
+
+    """
+    A provider reading from a fake_discord.Guild.
+    Every fetch waits for latency seconds, to stand in for a real
+    provider when benchmarking.
+    """
+
+    guild: "Guild" = None
+    # Seconds every fetch takes.
+    latency: float = 0
+    # Number of fetches made so far.
+    fetches: int = 0
+
+    def __init__(self, guild: "Guild", latency: float = 0) -> None:
+        self.guild = guild
+        self.latency = latency
+        self.fetches = 0
+
+    async def _wait(self) -> None:
+        self.fetches += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def fetch_members(self, ids: list[int]) -> dict[int, "Member"]:
+        await self._wait()
+        members = {}
+        for id in ids:
+            member = self.guild.get_member(id)
+            if member is not None:
+                members[id] = member
+        return members
+
+    async def fetch_all(self) -> list["Member"]:
+        await self._wait()
+        return self.guild.members
+
+    async def fetch_named(self, name: str) -> Optional["Member"]:
+        await self._wait()
+        return self.guild.get_member_named(name)
+
+class YnaMemberLoader(object):
+
+    """
+    Coalesces member lookups into bulk fetches, dataloader-style.
+
+    Lookups by ID made in the same event loop iteration, by one render
+    or by several renders sharing the loader, are fetched with a single
+    provider.fetch_members call. Lookups already in flight are joined
+    rather than fetched again. Results, misses included, are cached for
+    ttl seconds, keeping at most cache_size of them.
+
+    A loader belongs to the event loop it is first used on.
+    """
+
+    provider: YnaMemberProvider = None
+    # Seconds a result stays cached.
+    ttl: float = 60
+    # Number of results kept in the cache.
+    cache_size: int = 10000
+    # Largest number of IDs asked for in one fetch, or None.
+    max_batch_size: Optional[int] = None
+
+    def __init__(self, provider: YnaMemberProvider, ttl: float = 60, cache_size: int = 10000, max_batch_size: Optional[int] = None) -> None:
+        self.provider = provider
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.max_batch_size = max_batch_size
+
+        # key -> (expiry time, value), least recently used first
+        self._cache: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        # key -> future of a lookup that is queued or in flight
+        self._pending: dict[Any, asyncio.Future] = {}
+        # IDs waiting for the next bulk fetch
+        self._queue: list[int] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def _cache_get(self, key: Any, now: float) -> tuple[bool, Any]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= now:
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, entry[1]
+
+    def _cache_set(self, key: Any, value: Any, now: float) -> None:
+        if self.cache_size <= 0 or self.ttl <= 0:
+            return
+        self._cache[key] = (now + self.ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _pending_future(self, key: Any, loop: asyncio.AbstractEventLoop) -> tuple[asyncio.Future, bool]:
+        """
+        Returns the future of the lookup of key, and whether it was just
+        created, in which case the caller has to start the lookup.
+        """
+        future = self._pending.get(key)
+        if future is not None:
+            return future, False
+        future = self._pending[key] = loop.create_future()
+        return future, True
+
+    def _resolve(self, key: Any, value: Any = None, error: Optional[BaseException] = None) -> None:
+        future = self._pending.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        # keep a reference until the task is done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def load(self, id: int) -> Optional["Member"]:
+        """
+        Looks up a member by ID.
+        """
+
+        loop = asyncio.get_running_loop()
+        key = ("id", id)
+        found, value = self._cache_get(key, loop.time())
+        if found:
+            return value
+
+        future, new = self._pending_future(key, loop)
+        if new:
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            self._queue.append(id)
+        # one waiter being cancelled must not cancel the others
+        return await asyncio.shield(future)
+
+    async def load_many(self, ids: list[int]) -> list[Optional["Member"]]:
+        """
+        Looks up several members by ID, in one fetch where possible.
+        """
+        return await asyncio.gather(*(self.load(id) for id in ids))
+
+    def _dispatch(self) -> None:
+        ids, self._queue = self._queue, []
+        size = self.max_batch_size or len(ids)
+        for i in range(0, len(ids), size):
+            self._spawn(self._fetch(ids[i:i + size]))
+
+    async def _fetch(self, ids: list[int]) -> None:
+        try:
+            members = await self.provider.fetch_members(ids)
+        except Exception as e:
+            for id in ids:
+                self._resolve(("id", id), error=e)
+            return
+        except BaseException as e:
+            # cancelled: don't leave the keys pending for good
+            for id in ids:
+                self._resolve(("id", id), error=e)
+            raise
+
+        now = asyncio.get_running_loop().time()
+        for id in ids:
+            member = members.get(id)
+            self._cache_set(("id", id), member, now)
+            self._resolve(("id", id), member)
+
+    async def _load_single(self, key: Any, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        found, value = self._cache_get(key, loop.time())
+        if found:
+            return value
+
+        future, new = self._pending_future(key, loop)
+        if new:
+            self._spawn(self._fetch_single(key, fetch))
+        return await asyncio.shield(future)
+
+    async def _fetch_single(self, key: Any, fetch: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            result = await fetch()
+        except Exception as e:
+            self._resolve(key, error=e)
+            return
+        except BaseException as e:
+            self._resolve(key, error=e)
+            raise
+        self._cache_set(key, result, asyncio.get_running_loop().time())
+        self._resolve(key, result)
+
+    async def load_all(self) -> list["Member"]:
+        """
+        Looks up all members of the guild.
+        """
+        return await self._load_single(("all",), self.provider.fetch_all)
+
+    async def load_named(self, name: str) -> Optional["Member"]:
+        """
+        Looks up the first member that matches the name provided.
+        """
+        return await self._load_single(("named", name), lambda: self.provider.fetch_named(name))
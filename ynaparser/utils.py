@@ -1,9 +1,18 @@
+from functools import lru_cache
 from operator import attrgetter
 from typing import Any, Callable, Iterable, Optional, TypeVar
 
 T = TypeVar('T')
 
-__all__ = ["get", "find"]
+__all__ = ["attr_getter", "get", "find"]
+
+@lru_cache(maxsize=256)
+def attr_getter(path: str) -> attrgetter:
+    """
+    Returns the accessor of a dotted attribute path, built once per path
+    and shared by get and the YNA functions reading member attributes.
+    """
+    return attrgetter(path)
 
 def get(iterable: Iterable[T], /, **attrs: Any) -> Optional[T]:
     # global -> local
@@ -11,10 +20,10 @@ def get(iterable: Iterable[T], /, **attrs: Any) -> Optional[T]:
 
     if len(attrs) == 1:
         k, v = attrs.popitem()
-        pred = attrgetter(k.replace('__', '.'))
+        pred = attr_getter(k.replace('__', '.'))
         return next((elem for elem in iterable if pred(elem) == v), None)
 
-    converted = [(attrgetter(attr.replace('__', '.')), value) for attr, value in attrs.items()]
+    converted = [(attr_getter(attr.replace('__', '.')), value) for attr, value in attrs.items()]
     for elem in iterable:
         if _all(pred(elem) == value for pred, value in converted):
             return elem
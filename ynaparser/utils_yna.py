@@ -1,22 +1,107 @@
-from typing import Any
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Optional
 from .classes import YnaError
-import inspect
+from .utils import attr_getter
+import sys
+
+# The attributes templates may read from members, e.g. {user:display_name}.
+SAFE_ATTRS = frozenset({"id", "name", "discriminator", "nick", "display_name"})
 
 def get_caller_name():
-    return inspect.getouterframes(inspect.currentframe(), 2)[2].function
+    # only called once an error is raised, the frame walk is not free
+    return sys._getframe(2).f_code.co_name
+
+@lru_cache(maxsize=256)
+def compile_attr_path(attrs: str) -> Optional[Callable[[Any], Any]]:
+    """
+    Checks and compiles an attribute path into an accessor, once per
+    path. Returns None if the path leaves SAFE_ATTRS.
+    """
+    if not all(i in SAFE_ATTRS for i in attrs.split(".")):
+        return None
+    return attr_getter(attrs)
 
 def get_attr(obj: Any, attrs: str, source_function=None) -> Any:
     """
     Gets attribute of an object by an attribute path.
     """
-    source_function = source_function and source_function or get_caller_name()
-    attr = obj
-    for i in attrs.split("."):
-        try:
-            attr = getattr(attr, i)
-        except AttributeError as e:
-            raise YnaError("has no attrs", source_function=source_function) from e
-    return attr
+    getter = compile_attr_path(attrs)
+    if getter is None:
+        raise YnaError("has no attrs", source_function=source_function and source_function or get_caller_name())
+    try:
+        return getter(obj)
+    except AttributeError as e:
+        raise YnaError("has no attrs", source_function=source_function and source_function or get_caller_name()) from e
+
+def replace_many(content: str, replacements: Iterable[tuple[str, str]]) -> str:
+    """
+    Applies (old, new) replacements to content one after another,
+    like chained str.replace calls.
+
+    When the chain can't see its own output, it is done in a single
+    pass instead, see _fuse_replacements.
+    """
+    replacements = tuple(replacements)
+    if len(replacements) > 1:
+        fused = _fuse_replacements(replacements)
+        if fused is not None:
+            return fused(content)
+    for old, new in replacements:
+        content = content.replace(old, new)
+    return content
+
+@lru_cache(maxsize=128)
+def _fuse_replacements(replacements: tuple[tuple[str, str], ...]) -> Optional[Callable[[str], str]]:
+    """
+    Returns a function doing the replacements in a single pass, or None
+    if that could give a different result than doing them one after
+    another.
+
+    When every old is a single character and no new contains a
+    character replaced after it, this is a str.translate pass.
+    Otherwise every old is matched at once by one regex, which is only
+    the same if the olds can never overlap each other in the content,
+    and if no old can be found in or against the new of a replacement
+    before it. A new is never empty there, as removing an old could
+    join two pieces of content into a later one.
+    """
+    olds = [old for old, _ in replacements]
+    if all(len(old) == 1 for old in olds) and _blind_chain(replacements, allow_empty=True):
+        table = {}
+        for old, new in replacements:
+            table.setdefault(ord(old), new)
+        return lambda content: content.translate(table)
+
+    if not _blind_chain(replacements, allow_empty=False) or not _disjoint_olds(olds):
+        return None
+    import re
+    table = dict(replacements)
+    sub = re.compile("|".join(map(re.escape, olds))).sub
+    return lambda content: sub(lambda match: table[match.group()], content)
+
+def _blind_chain(replacements: tuple[tuple[str, str], ...], allow_empty: bool) -> bool:
+    # whether no new shares a character with an old replaced after it
+    later = set()
+    for old, new in reversed(replacements):
+        if later and (not (new or allow_empty) or not later.isdisjoint(new)):
+            return False
+        later.update(old)
+    return True
+
+def _disjoint_olds(olds: list[str]) -> bool:
+    # whether no two olds can match overlapping parts of the content
+    if not all(olds) or len(set(olds)) != len(olds):
+        return False
+    for a in olds:
+        for b in olds:
+            if a == b:
+                continue
+            if a in b:
+                return False
+            # a proper suffix of a is a proper prefix of b
+            if any(a.endswith(b[:n]) for n in range(1, min(len(a), len(b)))):
+                return False
+    return True
 
 def is_yna_error(error: YnaError | Any):
     return isinstance(error, YnaError)
@@ -25,18 +110,16 @@ def get_int(value: Any, error: str = "non int parameter", source_function=None)
     """
     Gets a integer from the function parameters.
     """
-    source_function = source_function and source_function or get_caller_name()
     try:
         return int(value)
     except ValueError as e:
-        raise YnaError(error, source_function=source_function) from e
+        raise YnaError(error, source_function=source_function and source_function or get_caller_name()) from e
 
 def get_float(value: Any, error: str = "non float parameter", source_function=None) -> int:
     """
     Gets a float from the function parameters.
     """
-    source_function = source_function and source_function or get_caller_name()
     try:
         return float(value)
     except ValueError as e:
-        raise YnaError(error, source_function=source_function) from e
\ No newline at end of file
+        raise YnaError(error, source_function=source_function and source_function or get_caller_name()) from e
\ No newline at end of file